@@ -1,5 +1,17 @@
+import html
+import string
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import orjson
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 # Page config
@@ -11,93 +23,227 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-
-/* ===== Global Typography & Base ===== */
-html, body, [class*="css"] {
-    font-family: -apple-system, BlinkMacSystemFont, "Inter", "Segoe UI",
-                 Roboto, Helvetica, Arial, sans-serif;
-    color: #E0E0E0;
-}
+STYLE_PATH = Path(__file__).parent / "style.css"
 
-/* ===== Main Header ===== */
-.main-header {
-    font-size: 3rem;
-    font-weight: 700;
-    letter-spacing: -0.02em;
-    text-align: center;
-    color: #42A5F5;
-    margin-bottom: 2.5rem;
-}
 
-/* ===== Chat Message Base ===== */
-.chat-message {
-    padding: 1.2rem 1.4rem;
-    border-radius: 16px;
-    margin-bottom: 1.4rem;
-    line-height: 1.65;
-    box-shadow: 0 8px 24px rgba(0,0,0,0.35);
-    opacity: 1;
-}
+@st.cache_data(show_spinner=False)
+def load_css(path: str, mtime: float) -> str:
+    """Read the stylesheet once per file version (mtime is part of the cache key)"""
+    return Path(path).read_text(encoding="utf-8")
 
-/* ===== User Message ===== */
-.user-message {
-    background: linear-gradient(135deg, #E3F2FD, #F1F8FF);
-    border-left: 5px solid #1E88E5;
-    color: #0D47A1;
-    font-weight: 500;
-}
 
-/* ===== Assistant Message (FIXED) ===== */
-.assistant-message {
-    background: #FFFFFF;
-    border-left: 5px solid #2E7D32;
-    color: #1B1F23;              /* CRITICAL FIX */
-    font-weight: 400;
-}
+st.markdown(
+    f"<style>{load_css(str(STYLE_PATH), STYLE_PATH.stat().st_mtime)}</style>",
+    unsafe_allow_html=True,
+)
 
-/* Force visibility for all nested elements */
-.assistant-message * {
-    color: #1B1F23 !important;
-    opacity: 1 !important;
-}
 
-/* ===== Metric Cards ===== */
-.metric-card {
-    background-color: #FFFFFF;
-    padding: 1.3rem;
-    border-radius: 14px;
-    border: 1px solid rgba(0,0,0,0.08);
-    box-shadow: 0 10px 28px rgba(0,0,0,0.35);
-    color: #263238;
-}
 
-/* Hover elevation */
-.metric-card:hover {
-    transform: translateY(-2px);
-    transition: all 0.2s ease-in-out;
-}
+# Backend API URL
+API_URL = "http://127.0.0.1:8000"
 
-/* ===== Small Text / Captions ===== */
-small, .caption {
-    color: #90A4AE;
-    font-size: 0.85rem;
-}
+# (connect, read) timeouts - agent runs can take a while, health checks should not
+QUERY_TIMEOUT = (5, 120)
+HEALTH_TIMEOUT = (2, 5)
+
+# Request bodies are pre-encoded with orjson, so the content type is set by hand
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# How long a finished run is answered from this browser session's cache; matches the
+# backend's offer caches, so a cached answer is no staler than a fresh one would be
+RESPONSE_CACHE_TTL = 5 * 60
+
+# Most queued messages sent together in one /query/batch call (matches the backend limit)
+BATCH_MAX_QUERIES = 4
+
+# One chat bubble in the history block
+MESSAGE_TEMPLATE = string.Template(
+    '<div class="chat-message $role_class">'
+    "<strong>$role_icon $role:</strong><br>\n"
+    "$content\n"
+    "</div>"
+)
 
-/* ===== Icons ===== */
-.chat-message svg,
-.chat-message img {
-    opacity: 1;
+# Progress labels for the NDJSON frames streamed by /query/stream
+NODE_LABELS = {
+    "intent": "🧠 Understanding your request...",
+    "flight_tool": "✈️ Searching flights...",
+    "hotel_tool": "🏨 Searching hotels...",
+    "merge_results": "📦 Collecting results...",
+    "web_search_fallback": "🔍 Searching the web...",
+    "clarify": "💬 Preparing a follow-up question...",
+    "synthesis": "📝 Putting results together...",
 }
 
-</style>
-""", unsafe_allow_html=True)
 
+@st.cache_resource
+def get_http() -> requests.Session:
+    """Shared HTTP session so every rerun reuses the same keep-alive connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        pool_block=True,
+        # POST is retried too - every query carries a request_id the backend dedups on. Read
+        # timeouts are not retried: the backend only remembers finished runs, so re-sending a
+        # slow query would run the agent again and record the turn twice.
+        max_retries=Retry(
+            total=3,
+            read=0,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST", "DELETE"}),
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+ResponseCache = Dict[Tuple[str, str, int, date], Tuple[float, dict]]
+
+
+def response_cache() -> ResponseCache:
+    """
+    This browser session's cache of finished agent runs: (query, session_id, turn, day) -> (expires_at, final frame).
+    Kept in session_state so one visitor's runs (and their session_id) are never served to another.
+    The answer depends on the conversation so far, so the backend turn count the query was sent at is
+    part of the key; so is the day, because the backend resolves relative dates like "tomorrow".
+    """
+    if "response_cache" not in st.session_state:
+        st.session_state.response_cache = {}
+    return st.session_state.response_cache
+
+
+def run_query(
+    http: requests.Session,
+    cache: ResponseCache,
+    query: str,
+    session_id: Optional[str],
+    turn: int,
+    on_frame: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Run a query through /query/stream and return the final frame.
+    A query repeated at the same point of a conversation is answered from cache, marked with "cached": True;
+    a first query (no session yet) is never cached, and failures raise so they are never cached.
+    Runs on worker threads, so it must not touch any Streamlit API - pass in get_http()/response_cache().
+    """
+    key = (query, session_id, turn, date.today()) if session_id else None
+    now = time.monotonic()
+    hit = cache.get(key) if key else None
+    if hit and hit[0] > now:
+        return {**hit[1], "cached": True}
+
+    with http.post(
+        f"{API_URL}/query/stream",
+        data=orjson.dumps({"query": query, "session_id": session_id, "request_id": str(uuid.uuid4())}),
+        headers=JSON_HEADERS,
+        stream=True,
+        timeout=QUERY_TIMEOUT,
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            frame = orjson.loads(line)
+            if frame.get("error"):
+                raise RuntimeError(frame["error"])
+            if frame.get("done"):
+                if key:
+                    for stale in [k for k, (expires_at, _) in cache.items() if expires_at <= now]:
+                        del cache[stale]
+                    cache[key] = (now + RESPONSE_CACHE_TTL, frame)
+                return frame
+            if on_frame:
+                on_frame(frame)
+
+    raise RuntimeError("Backend closed the stream without a result")
+
+
+@st.cache_resource
+def pool() -> ThreadPoolExecutor:
+    """Worker threads that run agent queries so the script thread never blocks on them"""
+    return ThreadPoolExecutor(max_workers=4)
+
+
+def submit_query(query: str, session_id: Optional[str]) -> dict:
+    """Start run_query on the worker pool; the returned handle is polled by pending_query()"""
+    frames: List[dict] = []
+    turn = (st.session_state.last_response or {}).get("turn_count", 0)
+    future = pool().submit(run_query, get_http(), response_cache(), query, session_id, turn, frames.append)
+    return {"future": future, "frames": frames, "queries": [query]}
+
+
+def run_batch(http: requests.Session, queries: List[str], session_id: Optional[str]) -> dict:
+    """
+    Send queued queries as one /query/batch call. Returns the response for the last
+    one, whose conversation_history already holds every turn of the batch.
+    Runs on worker threads, so it must not touch any Streamlit API.
+    """
+    response = http.post(
+        f"{API_URL}/query/batch",
+        data=orjson.dumps({"queries": queries, "session_id": session_id, "request_id": str(uuid.uuid4())}),
+        headers=JSON_HEADERS,
+        timeout=QUERY_TIMEOUT,
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)[-1]
+
+
+def submit_batch(queries: List[str], session_id: Optional[str]) -> dict:
+    """Start run_batch on the worker pool; same handle shape as submit_query()"""
+    frames = [{"node": "batch", "response": f"⏳ Processing {len(queries)} queued messages..."}]
+    future = pool().submit(run_batch, get_http(), queries, session_id)
+    return {"future": future, "frames": frames, "queries": queries}
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def health() -> int:
+    """Backend /health status code; repeated checks within a few seconds are served from cache"""
+    return get_http().get(f"{API_URL}/health", timeout=HEALTH_TIMEOUT).status_code
+
+
+@st.cache_data(show_spinner=False)
+def render_metrics_html(resp_json: bytes) -> str:
+    """Metric row + intent details for a /query response as one HTML block, cached per response"""
+    resp = orjson.loads(resp_json)
+    intent_data = resp.get("intent") or {}
+
+    metrics = [
+        ("Intent", (intent_data.get("intent") or "N/A").replace("_", " ").title()),
+        ("Flight API", "✅ Used" if resp.get("used_flight_api") else "❌ Not Used"),
+        ("Hotel API", "✅ Used" if resp.get("used_hotel_api") else "❌ Not Used"),
+        ("Messages", len(resp.get("conversation_history") or [])),
+    ]
+    cards = "".join(
+        f'<div class="metric-card"><div class="metric-label">{label}</div>'
+        f'<div class="metric-value">{html.escape(str(value))}</div></div>'
+        for label, value in metrics
+    )
+
+    details = ""
+    if intent_data:
+        fields = [
+            ("Origin", "origin"),
+            ("Check-in", "check_in"),
+            ("Destination", "destination"),
+            ("Check-out", "check_out"),
+            ("Travelers", "travelers"),
+            ("Reasoning", "reasoning"),
+        ]
+        rows = "".join(
+            f"<div><strong>{label}:</strong> {html.escape(str(intent_data.get(key, 'N/A')))}</div>"
+            for label, key in fields
+        )
+        details = f'<div class="intent-details">{rows}</div>'
 
+    return (
+        f'<div class="metric-row">{cards}</div>'
+        f"<details><summary>🔍 View Intent Details</summary>{details}</details>"
+    )
 
-# Backend API URL
-API_URL = "http://127.0.0.1:8000"
 
 # Initialize session state
 if "session_id" not in st.session_state:
@@ -106,6 +252,8 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "last_response" not in st.session_state:
     st.session_state.last_response = None
+if "pending_queries" not in st.session_state:
+    st.session_state.pending_queries = []
 
 # Sidebar
 with st.sidebar:
@@ -136,12 +284,20 @@ with st.sidebar:
     
     st.markdown("---")
     
+    st.toggle("♻️ Bypass response cache", value=False, key="bypass_cache")
+    
     if st.button("🗑️ Clear Conversation", use_container_width=True):
         if st.session_state.session_id:
             try:
-                requests.delete(f"{API_URL}/session/{st.session_state.session_id}")
+                get_http().delete(
+                    f"{API_URL}/session/{st.session_state.session_id}",
+                    timeout=HEALTH_TIMEOUT,
+                )
             except:  # noqa: E722
                 pass
+        response_cache().clear()
+        st.session_state.pop("pending", None)
+        st.session_state.pending_queries = []
         st.session_state.session_id = None
         st.session_state.messages = []
         st.session_state.last_response = None
@@ -157,127 +313,151 @@ st.markdown('<div class="main-header">✈️ Travia</div>', unsafe_allow_html=Tr
 chat_container = st.container()
 
 with chat_container:
+    # Render the whole history in one markdown call - one element per rerun instead of one per message
+    html_parts = []
     for message in st.session_state.messages:
         role_class = "user-message" if message["role"] == "user" else "assistant-message"
         role_icon = "👤" if message["role"] == "user" else "🤖"
         
-        st.markdown(f"""
-        <div class="chat-message {role_class}">
-            <strong>{role_icon} {message["role"].capitalize()}:</strong><br>
-            {message["content"]}
-        """, unsafe_allow_html=True)
+        html_parts.append(
+            MESSAGE_TEMPLATE.substitute(
+                role_class=role_class,
+                role_icon=role_icon,
+                role=message["role"].capitalize(),
+                content=html.escape(message["content"]),
+            )
+        )
+    
+    if html_parts:
+        st.markdown("\n".join(html_parts), unsafe_allow_html=True)
+
+
+@st.fragment(run_every=0.25 if st.session_state.get("pending") else None)
+def pending_query():
+    """Poll the in-flight query, showing its progress until the worker thread finishes"""
+    pending = st.session_state.get("pending")
+    if not pending:
+        return
+
+    future = pending["future"]
+    if not future.done():
+        frames = pending["frames"]
+        frame = frames[-1] if frames else {"node": "intent"}
+        st.info(frame.get("response") or NODE_LABELS.get(frame["node"], f"⏳ {frame['node']}..."))
+        return
+
+    del st.session_state.pending
+    try:
+        data = future.result()
+
+        # A cached answer is shown on its own - it was never recorded as a new turn on the
+        # backend, so it must not replace the (newer) conversation or the last response
+        if data.get("cached"):
+            st.session_state.cached_answer = data["answer"]
+        else:
+            # Update session
+            st.session_state.session_id = data["session_id"]
+            st.session_state.messages = data["conversation_history"]
+            st.session_state.last_response = data
+
+    except requests.exceptions.ConnectionError:
+        st.session_state.query_error = "❌ Cannot connect to backend. Make sure the FastAPI server is running on http://127.0.0.1:8000"
+    except requests.exceptions.HTTPError as e:
+        st.session_state.query_error = f"❌ Error: {e.response.status_code} - {e.response.text}"
+    except Exception as e:
+        st.session_state.query_error = f"❌ Error: {str(e)}"
+
+    # Messages sent while this one was running go out together as one batch
+    queued = st.session_state.pending_queries[:BATCH_MAX_QUERIES]
+    st.session_state.pending_queries = st.session_state.pending_queries[BATCH_MAX_QUERIES:]
+    if len(queued) == 1:
+        st.session_state.pending = submit_query(queued[0], st.session_state.session_id)
+    elif queued:
+        st.session_state.pending = submit_batch(queued, st.session_state.session_id)
+
+    st.rerun()
+
+
+pending_query()
+
+if "query_error" in st.session_state:
+    st.error(st.session_state.pop("query_error"))
+
+if "cached_answer" in st.session_state:
+    st.info(f"♻️ You asked this a moment ago - here is the same answer again:\n\n{st.session_state.pop('cached_answer')}")
 
 # Display last response details
 if st.session_state.last_response:
-    st.markdown("---")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric(
-            "Intent",
-            st.session_state.last_response.get("intent", {}).get("intent", "N/A").replace("_", " ").title()
-        )
-    
-    with col2:
-        st.metric(
-            "Flight API",
-            "✅ Used" if st.session_state.last_response.get("used_flight_api") else "❌ Not Used"
-        )
-    
-    with col3:
-        st.metric(
-            "Hotel API",
-            "✅ Used" if st.session_state.last_response.get("used_hotel_api") else "❌ Not Used"
-        )
-    
-    with col4:
-        st.metric(
-            "Messages",
-            len(st.session_state.messages)
+    # last_response is only ever replaced, never mutated - re-serialize it only when it changes
+    if st.session_state.get("metrics_for") is not st.session_state.last_response:
+        st.session_state.metrics_for = st.session_state.last_response
+        st.session_state.metrics_html = render_metrics_html(
+            orjson.dumps(st.session_state.last_response, option=orjson.OPT_SORT_KEYS)
         )
-    
-    # Show intent details in expander
-    with st.expander("🔍 View Intent Details"):
-        intent_data = st.session_state.last_response.get("intent", {})
-        if intent_data:
-            col_a, col_b = st.columns(2)
-            
-            with col_a:
-                st.write("**Origin:**", intent_data.get("origin", "N/A"))
-                st.write("**Destination:**", intent_data.get("destination", "N/A"))
-                st.write("**Travelers:**", intent_data.get("travelers", "N/A"))
-            
-            with col_b:
-                st.write("**Check-in:**", intent_data.get("check_in", "N/A"))
-                st.write("**Check-out:**", intent_data.get("check_out", "N/A"))
-                st.write("**Reasoning:**", intent_data.get("reasoning", "N/A"))
+
+    st.markdown("---")
+    st.markdown(st.session_state.metrics_html, unsafe_allow_html=True)
 
 # Input area
 st.markdown("---")
 
-# Use session state for input if example was clicked
-query = st.text_input(
-    "💬 Ask me anything about flights, hotels, or travel plans:",
-    placeholder="e.g., Book a flight from BOM to DEL tomorrow",
-    key="user_input",
-    value=st.session_state.get("input_query", "")
-)
 
-# Clear the input_query after using it
-if "input_query" in st.session_state:
-    del st.session_state.input_query
+@st.fragment
+def input_area():
+    """
+    Query box, Send/Health buttons and the submit handler. Running as a fragment means
+    typing and health checks rerun only this block, not the chat history.
+    """
+    # Use session state for input if example was clicked
+    query = st.text_input(
+        "💬 Ask me anything about flights, hotels, or travel plans:",
+        placeholder="e.g., Book a flight from BOM to DEL tomorrow",
+        key="user_input",
+        value=st.session_state.get("input_query", "")
+    )
 
-col1, col2, col3 = st.columns([3, 1, 1])
+    # Clear the input_query after using it
+    if "input_query" in st.session_state:
+        del st.session_state.input_query
 
-with col2:
-    submit_button = st.button("🚀 Send", use_container_width=True, type="primary")
+    col1, col2, col3 = st.columns([3, 1, 1])
 
-with col3:
-    health_button = st.button("💚 Health Check", use_container_width=True)
+    with col2:
+        submit_button = st.button("🚀 Send", use_container_width=True, type="primary")
 
-# Handle health check
-if health_button:
-    try:
-        response = requests.get(f"{API_URL}/health")
-        if response.status_code == 200:
-            st.success("✅ Backend is healthy!")
-        else:
-            st.error("❌ Backend unhealthy")
-    except Exception as e:
-        st.error(f"❌ Cannot reach backend: {str(e)}")
+    with col3:
+        health_button = st.button("💚 Health Check", use_container_width=True)
 
-# Handle query submission
-if submit_button and query:
-    with st.spinner("🔍 Processing your request..."):
+    # Handle health check
+    if health_button:
         try:
-            # Make API request
-            response = requests.post(
-                f"{API_URL}/query",
-                json={
-                    "query": query,
-                    "session_id": st.session_state.session_id
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Update session
-                st.session_state.session_id = data["session_id"]
-                st.session_state.messages = data["conversation_history"]
-                st.session_state.last_response = data
-                
-                # Show success
-                st.success("✅ Response received!")
-                st.rerun()
+            if health() == 200:
+                st.success("✅ Backend is healthy!")
             else:
-                st.error(f"❌ Error: {response.status_code} - {response.text}")
-                
-        except requests.exceptions.ConnectionError:
-            st.error("❌ Cannot connect to backend. Make sure the FastAPI server is running on http://127.0.0.1:8000")
+                st.error("❌ Backend unhealthy")
         except Exception as e:
-            st.error(f"❌ Error: {str(e)}")
+            st.error(f"❌ Cannot reach backend: {str(e)}")
+
+    # Handle query submission - the agent runs on a worker thread and pending_query() polls it
+    if submit_button and query:
+        if st.session_state.get("bypass_cache"):
+            response_cache().clear()
+
+        pending = st.session_state.get("pending")
+        if not pending:
+            st.session_state.pending = submit_query(query, st.session_state.session_id)
+            st.rerun()
+
+        # A query is already in flight - queue this one for the next batch, ignoring
+        # duplicates so a double click on Send doesn't run the same query twice
+        if query not in pending["queries"] and query not in st.session_state.pending_queries:
+            st.session_state.pending_queries.append(query)
+
+    if st.session_state.pending_queries:
+        st.caption(f"📥 {len(st.session_state.pending_queries)} message(s) queued - sent together once the current one finishes")
+
+
+input_area()
 
 # Instructions
 if not st.session_state.messages:
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from langgraph.graph import StateGraph, END
 
 from src.models.state import AgentState
@@ -5,29 +7,41 @@ from src.agents.nodes import (
     intent_node,
     flight_tool,
     hotel_tool,
+    merge_results_node,
     clarify_node,
     synthesis_node,
     web_search_fallback_node,
 )
-from src.agents.routers import router, flight_tool_router
+from src.agents.routers import router, tools_router
+from src.utils.cache import cached_tool
 
 
 def create_agent():
     graph = StateGraph(AgentState)
 
     graph.add_node("intent", intent_node)
-    graph.add_node("flight_tool", flight_tool)
-    graph.add_node("hotel_tool", hotel_tool)
+    graph.add_node(
+        "flight_tool",
+        cached_tool("flight_tool", "flights", ("origin", "destination", "check_in", "travelers"))(flight_tool),
+    )
+    graph.add_node(
+        "hotel_tool",
+        cached_tool("hotel_tool", "hotels", ("destination", "check_in", "check_out", "travelers"))(hotel_tool),
+    )
+    graph.add_node("merge_results", merge_results_node)
     graph.add_node("clarify", clarify_node)
     graph.add_node("synthesis", synthesis_node)
     graph.add_node("web_search_fallback", web_search_fallback_node)
 
     graph.set_entry_point("intent")
 
+    # "both" fans out to flight_tool and hotel_tool in the same step; merge_results
+    # runs once after whichever tools were scheduled have finished
     graph.add_conditional_edges("intent", router)
-    graph.add_conditional_edges("flight_tool", flight_tool_router)
+    graph.add_edge("flight_tool", "merge_results")
+    graph.add_edge("hotel_tool", "merge_results")
+    graph.add_conditional_edges("merge_results", tools_router)
 
-    graph.add_edge("hotel_tool", "synthesis")
     graph.add_edge("clarify", END)
     graph.add_edge("synthesis", END)
     graph.add_edge("web_search_fallback", END)
@@ -35,5 +49,7 @@ def create_agent():
     return graph.compile()
 
 
-# Global instance
-agent = create_agent()
+@lru_cache(maxsize=1)
+def get_agent():
+    """Compiled agent graph, built on first use instead of at import time"""
+    return create_agent()
@@ -1,34 +1,99 @@
-from datetime import datetime, timedelta
-from typing import cast
+import logging
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Tuple, cast
 import requests
+import soupsieve
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from amadeus import ResponseError
 
+try:
+    import ijson
+except ImportError:  # optional - fall back to parsing the whole SearXNG response
+    ijson = None
+
 from src.models.state import AgentState
 from src.models.schemas import TravelIntent
 from src.services.llm_service import llm_service
 from src.services.amadeus_service import amadeus_service
-from src.utils.cache import airport_cache
-from src.config.settings import EUR_TO_INR
+from src.config.settings import CURRENCY_TO_INR, EUR_TO_INR, FAST_INTENT
 from src.utils.airport_code_validator import get_airport_validator
 
-
-def intent_node(state: AgentState):
-    structured = llm_service.get_structured_llm(TravelIntent)
-
-    today = datetime.now().strftime('%Y-%m-%d')
-    tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-    next_week = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
-    
-    # Build context from conversation history
-    context = ""
-    if state.conversation_history:
-        context = "\n\nPrevious conversation:\n"
-        for msg in state.conversation_history[-4:]:  # Last 4 messages
-            context += f"{msg['role']}: {msg['content']}\n"
-    
-    raw = structured.invoke(
-        f"""
+log = logging.getLogger(__name__)
+
+# Separator around the per-search debug blocks
+BANNER = "=" * 70
+
+# Intents whose origin/destination need airport validation
+FLIGHT_INTENTS = frozenset({"flight_search", "both"})
+HOTEL_INTENTS = frozenset({"hotel_search", "both"})
+
+ISO_DATE_FORMAT = '%Y-%m-%d'
+# Departure time as shown in the flight list
+FLIGHT_TIME_FORMAT = "%d %b %Y, %I:%M %p"
+
+# Hotel offer lookups: how many hotels to try, how many run at once, and when to stop
+HOTEL_OFFER_CANDIDATES = 30
+HOTEL_OFFER_WORKERS = 10
+HOTEL_OFFER_TARGET = 5
+# Retries for a rate-limited (429) offer lookup, with exponential backoff + jitter
+HOTEL_OFFER_RETRIES = 3
+HOTEL_OFFER_BACKOFF_SECONDS = 0.5
+HOTEL_OFFER_MAX_BACKOFF_SECONDS = 4.0
+
+# Web search results shown in a fallback answer
+WEB_RESULTS_LIMIT = 5
+
+# DuckDuckGo HTML result markup, compiled once instead of on every fallback search
+DDG_RESULT_SELECTOR = soupsieve.compile('div.result__body')
+DDG_TITLE_SELECTOR = soupsieve.compile('a.result__a')
+DDG_SNIPPET_SELECTOR = soupsieve.compile('a.result__snippet')
+
+# SearXNG instances are queried concurrently, so one slow instance only costs this much
+SEARXNG_TIMEOUT_SECONDS = 5
+
+# Shared keep-alive pool for the web search fallback, so repeat searches skip the TCP/TLS handshake
+web_session = requests.Session()
+web_session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+# Only quick 502/503/504 answers are retried: a hung instance must cost one SEARXNG_TIMEOUT_SECONDS,
+# not one per retry - the SearXNG fan-out already provides the redundancy
+web_session.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, connect=0, read=0, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+))
+
+# Fields each search intent needs before it can run: intent -> (log label, ((field, description), ...))
+REQUIRED_FIELDS = {
+    "flight_search": ("Flight search", (
+        ("origin", "departure city/airport"),
+        ("destination", "arrival city/airport"),
+        ("check_in", "departure/travel date"),
+    )),
+    "hotel_search": ("Hotel search", (
+        ("destination", "destination city"),
+        ("check_in", "check-in date"),
+        ("check_out", "check-out date"),
+    )),
+    "both": ("Combined search", (
+        ("origin", "departure city/airport"),
+        ("destination", "destination city"),
+        ("check_in", "check-in/departure date"),
+        ("check_out", "check-out date"),
+    )),
+}
+
+# Static part of the intent extraction prompt; only the dates, context and query change per call
+INTENT_PROMPT = """
 Extract structured travel intent from the user query.
 Use intent=clarify if anything required is missing.
 Use intent=follow_up if the user is asking about previous results or making modifications to a previous query.
@@ -55,14 +120,157 @@ Use intent=follow_up if the user is asking about previous results or making modi
 5. Extract city/airport names as they appear - DO NOT convert to IATA codes yourself.
    Examples: "Mumbai", "Bombay", "BOM" all acceptable - validation happens later.
 
-Current Query: {state.query}
+Current Query: {query}
 """
+
+# Words that can stand for a travel date ("in two weeks", "this evening", "asap")
+DATE_HINT_PATTERN = re.compile(
+    r"\d|\b(?:today|tonight|tomorrow|now|asap|soon|morning|afternoon|evening|"
+    r"day|days|night|nights|week|weeks|weekend|weekends|fortnight|month|months|year|"
+    r"jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec|"
+    r"january|february|march|april|june|july|august|september|october|november|december|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday|christmas|diwali|holiday|holidays)\b",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=1)
+def get_intent_llm():
+    """Structured-output LLM for TravelIntent - built once, not on every intent_node call"""
+    return llm_service.get_structured_llm(TravelIntent)
+
+
+@lru_cache(maxsize=1)
+def prompt_dates(day: date) -> Tuple[str, str, str]:
+    """Today, tomorrow and next week as ISO strings - formatted once per calendar day"""
+    return (
+        day.strftime(ISO_DATE_FORMAT),
+        (day + timedelta(days=1)).strftime(ISO_DATE_FORMAT),
+        (day + timedelta(days=7)).strftime(ISO_DATE_FORMAT),
     )
 
-    if isinstance(raw, dict):
-        intent_data = raw 
-    else:
-        intent_data = cast(TravelIntent, raw).model_dump()
+
+def looks_underspecified(state: AgentState) -> bool:
+    """
+    True for an opening query with neither a date nor a place in it ("hi", "help me travel") -
+    the LLM could only answer clarify. Anything naming a place goes to the LLM, so clarify_node
+    can echo back what the user did give.
+    """
+    # The history already holds the current user message, so an opening query has at most one entry
+    opening_query = len(state.conversation_history) <= 1
+    return (
+        opening_query
+        and not DATE_HINT_PATTERN.search(state.query)
+        and not get_airport_validator().mentions_location(state.query)
+    )
+
+
+# Follow-up fast path: the only things a follow-up may say, and filler words around them
+FOLLOW_UP_DATE_PATTERN = re.compile(r"\b(today|tomorrow|next week|\d{4}-\d{2}-\d{2})\b", re.IGNORECASE)
+FOLLOW_UP_TRAVELERS_PATTERN = re.compile(
+    r"\b(\d{1,2})\s*(?:people|persons|travel+ers|adults|passengers|guests)\b", re.IGNORECASE
+)
+FOLLOW_UP_FILLER_PATTERN = re.compile(
+    r"\b(?:what|how|about|and|instead|then|ok|okay|please|for|on|make|it|change|to|the|date|try|same|but)\b|[^\w]",
+    re.IGNORECASE,
+)
+SEARCH_INTENTS = FLIGHT_INTENTS | HOTEL_INTENTS
+
+
+def patch_previous_intent(state: AgentState, dates: Tuple[str, str, str]):
+    """
+    Answer a follow-up that only changes the date or traveler count ("how about tomorrow?",
+    "for 3 people") by patching the session's previous search, without the LLM.
+    Returns None when the query says anything else.
+    """
+    previous = state.previous_intent
+    if not previous or previous.get("intent") not in SEARCH_INTENTS:
+        return None
+
+    query = state.query
+    date_match = FOLLOW_UP_DATE_PATTERN.search(query)
+    travelers_match = FOLLOW_UP_TRAVELERS_PATTERN.search(query)
+    if not date_match and not travelers_match:
+        return None
+
+    # Anything left besides the modifiers and filler needs the LLM to understand
+    rest = FOLLOW_UP_TRAVELERS_PATTERN.sub(" ", FOLLOW_UP_DATE_PATTERN.sub(" ", query))
+    if FOLLOW_UP_FILLER_PATTERN.sub("", rest):
+        return None
+
+    intent_data = dict(previous)
+    changed = []
+
+    if date_match:
+        today, tomorrow, next_week = dates
+        phrase = date_match.group(1).lower()
+        new_check_in = {"today": today, "tomorrow": tomorrow, "next week": next_week}.get(phrase, phrase)
+        try:
+            # Keep the length of stay when moving a hotel search
+            if previous.get("check_in") and previous.get("check_out"):
+                nights = date.fromisoformat(previous["check_out"]) - date.fromisoformat(previous["check_in"])
+                intent_data["check_out"] = (date.fromisoformat(new_check_in) + nights).strftime(ISO_DATE_FORMAT)
+        except ValueError:
+            return None
+        intent_data["check_in"] = new_check_in
+        changed.append(f"date {new_check_in}")
+
+    if travelers_match:
+        intent_data["travelers"] = int(travelers_match.group(1))
+        changed.append(f"{intent_data['travelers']} traveler(s)")
+
+    intent_data["reasoning"] = f"Follow-up: previous search with {', '.join(changed)}"
+    log.debug("⚡ Follow-up fast path: %s", intent_data["reasoning"])
+    return intent_data
+
+
+def intent_node(state: AgentState):
+    # Skip the LLM round-trip when the query can't be a complete search yet
+    if looks_underspecified(state):
+        log.debug("🔄 Intent changed to CLARIFY: no travel date or place in the query")
+        return {
+            "intent": {
+                "intent": "clarify",
+                "origin": None,
+                "destination": None,
+                "check_in": None,
+                "check_out": None,
+                "travelers": 1,
+                # Places outside airports.csv ("Shimla") aren't recognised here, so only claim the date
+                "reasoning": "Missing: travel date",
+            }
+        }
+
+    now = datetime.now()
+    dates = prompt_dates(now.date())
+    today, tomorrow, next_week = dates
+
+    intent_data = patch_previous_intent(state, dates) if FAST_INTENT else None
+
+    if intent_data is None:
+        structured = get_intent_llm()
+
+        # Build context from conversation history
+        context = ""
+        if state.conversation_history:
+            context = "\n\nPrevious conversation:\n"
+            for msg in state.conversation_history[-4:]:  # Last 4 messages
+                context += f"{msg['role']}: {msg['content']}\n"
+
+        raw = structured.invoke(
+            INTENT_PROMPT.format(
+                context=context,
+                today=today,
+                tomorrow=tomorrow,
+                next_week=next_week,
+                query=state.query,
+            )
+        )
+
+        if isinstance(raw, dict):
+            intent_data = raw
+        else:
+            intent_data = cast(TravelIntent, raw).model_dump()
     
     # =========================================
     # AIRPORT CODE VALIDATION & CORRECTION
@@ -74,7 +282,7 @@ Current Query: {state.query}
     original_intent = intent_data.get("intent")
     
     # Validate and correct airport codes for flight searches
-    if original_intent in ["flight_search", "both"]:
+    if original_intent in FLIGHT_INTENTS:
         origin_input = intent_data.get("origin")
         dest_input = intent_data.get("destination")
         
@@ -98,7 +306,7 @@ Current Query: {state.query}
                     intent_data["reasoning"] = f"Could not find airport code for arrival city: '{dest_input}'"
     
     # Validate hotel destination
-    if original_intent in ["hotel_search", "both"]:
+    if original_intent in HOTEL_INTENTS:
         dest_input = intent_data.get("destination")
         if dest_input:
             # For hotels, we validate the city exists
@@ -121,78 +329,28 @@ Current Query: {state.query}
             intent_data["destination"] = intent_data["origin"]
             intent_data["origin"] = None
     
-    # STRICT VALIDATION FOR FLIGHT SEARCH
-    if original_intent == "flight_search":
-        missing = []
-        
-        # Check for origin
-        if not intent_data.get("origin"):
-            missing.append("departure city/airport")
-        
-        # Check for destination
-        if not intent_data.get("destination"):
-            missing.append("arrival city/airport")
+    # STRICT VALIDATION - force clarify if a field the intent needs is missing
+    required = REQUIRED_FIELDS.get(original_intent)
+    if required:
+        label, fields = required
+        missing = [description for field, description in fields if not intent_data.get(field)]
         
         # Check if origin and destination are the same (likely an error)
-        if (intent_data.get("origin") and 
-            intent_data.get("destination") and 
-            intent_data.get("origin") == intent_data.get("destination")):
+        origin = intent_data.get("origin")
+        if original_intent == "flight_search" and origin and origin == intent_data.get("destination"):
             missing.append("arrival city/airport (cannot be same as departure)")
         
-        # Check for departure date
-        if not intent_data.get("check_in"):
-            missing.append("departure/travel date")
-        
-        # If anything is missing, force clarify
-        if missing:
-            intent_data["intent"] = "clarify"
-            intent_data["reasoning"] = f"Missing: {', '.join(missing)}"
-            print(f"⚠️  Flight search validation failed: {intent_data['reasoning']}")
-    
-    # STRICT VALIDATION FOR HOTEL SEARCH
-    if original_intent == "hotel_search":
-        missing = []
-        
-        if not intent_data.get("destination"):
-            missing.append("destination city")
-        
-        if not intent_data.get("check_in"):
-            missing.append("check-in date")
-        
-        if not intent_data.get("check_out"):
-            missing.append("check-out date")
-        
         if missing:
             intent_data["intent"] = "clarify"
             intent_data["reasoning"] = f"Missing: {', '.join(missing)}"
-            print(f"⚠️  Hotel search validation failed: {intent_data['reasoning']}")
-    
-    # STRICT VALIDATION FOR BOTH
-    if original_intent == "both":
-        missing = []
-        
-        if not intent_data.get("origin"):
-            missing.append("departure city/airport")
-        
-        if not intent_data.get("destination"):
-            missing.append("destination city")
-        
-        if not intent_data.get("check_in"):
-            missing.append("check-in/departure date")
-        
-        if not intent_data.get("check_out"):
-            missing.append("check-out date")
-        
-        if missing:
-            intent_data["intent"] = "clarify"
-            intent_data["reasoning"] = f"Missing: {', '.join(missing)}"
-            print(f"⚠️  Combined search validation failed: {intent_data['reasoning']}")
+            log.debug("⚠️  %s validation failed: %s", label, intent_data["reasoning"])
 
     # Past-date guard
+    check_in_date = None
     if intent_data.get("check_in"):
         try:
             check_in_date = datetime.fromisoformat(intent_data["check_in"])
-            if check_in_date.date() < datetime.now().date():
+            if check_in_date.date() < now.date():
                 intent_data["intent"] = "clarify"
                 intent_data["reasoning"] = "Check-in/departure date cannot be in the past"
         except ValueError:
@@ -201,9 +359,10 @@ Current Query: {state.query}
     
     # Debug output
     if intent_data.get("intent") == "clarify":
-        print(f"🔄 Intent changed to CLARIFY: {intent_data.get('reasoning')}")
+        log.debug("🔄 Intent changed to CLARIFY: %s", intent_data.get("reasoning"))
 
-    return {"intent": intent_data}
+    # Parsed once here so downstream nodes don't re-parse the ISO string
+    return {"intent": intent_data, "check_in_date": check_in_date}
 
 def flight_tool(state: AgentState):
     if state.intent is None:
@@ -211,29 +370,29 @@ def flight_tool(state: AgentState):
     i = state.intent
 
     try:
-        print(f"\n{'='*70}")
-        print("FLIGHT SEARCH DEBUG - START")
-        print(f"{'='*70}")
-        print(f"📍 Origin: {i.get('origin')}")
-        print(f"📍 Destination: {i.get('destination')}")
-        print(f"📅 Departure Date: {i.get('check_in')}")
-        print(f"👥 Travelers: {i.get('travelers')}")
-        print(f"{'='*70}")
+        log.debug(BANNER)
+        log.debug("FLIGHT SEARCH DEBUG - START")
+        log.debug(BANNER)
+        log.debug("📍 Origin: %s", i.get('origin'))
+        log.debug("📍 Destination: %s", i.get('destination'))
+        log.debug("📅 Departure Date: %s", i.get('check_in'))
+        log.debug("👥 Travelers: %s", i.get('travelers'))
+        log.debug(BANNER)
         
         # Validate required fields
         if not i.get("origin"):
-            print("❌ ERROR: Missing origin")
+            log.warning("❌ ERROR: Missing origin")
             return {"flights": [], "response": "Missing origin airport code"}
         
         if not i.get("destination"):
-            print("❌ ERROR: Missing destination")
+            log.warning("❌ ERROR: Missing destination")
             return {"flights": [], "response": "Missing destination airport code"}
         
         if not i.get("check_in"):
-            print("❌ ERROR: Missing departure date")
+            log.warning("❌ ERROR: Missing departure date")
             return {"flights": [], "response": "Missing departure date"}
         
-        print("\n🚀 Making API call to Amadeus...")
+        log.debug("🚀 Making API call to Amadeus...")
         
         res_data = amadeus_service.search_flights(
             i["origin"],
@@ -242,21 +401,21 @@ def flight_tool(state: AgentState):
             i["travelers"]
         )
         
-        print("\n✅ API Response Status: SUCCESS")
-        print(f"📊 Number of flight offers: {len(res_data) if res_data else 0}")
-        print(f"{'='*70}\n")
+        log.debug("✅ API Response Status: SUCCESS")
+        log.debug("📊 Number of flight offers: %s", len(res_data) if res_data else 0)
+        log.debug(BANNER)
         
         return {"flights": res_data}
         
     except ResponseError as e:
-        print(f"\n{'='*70}")
-        print("❌ AMADEUS API ERROR - Checking for fallback")
-        print(f"{'='*70}")
+        log.debug(BANNER)
+        log.warning("❌ AMADEUS API ERROR - Checking for fallback")
+        log.debug(BANNER)
         
         error_dict = {}
         try:
             error_dict = e.response.result if hasattr(e, 'response') else {}
-            print(f"Full Error Response: {error_dict}")
+            log.debug("Full Error Response: %s", error_dict)
             
             if error_dict.get('errors'):
                 error_code = error_dict['errors'][0].get('code')
@@ -264,16 +423,15 @@ def flight_tool(state: AgentState):
                 
                 # System error - API is down, use web search fallback
                 if error_code == 141 or error_status == 500:
-                    print("⚠️ API appears to be down (Error 141), using web search fallback...")
+                    log.warning("⚠️ API appears to be down (Error 141), using web search fallback...")
                     
                     # Get city names for better search
-                    validator = get_airport_validator()
-                    origin_city = validator.get_city_name(i["origin"]) if i.get("origin") else i["origin"]
-                    dest_city = validator.get_city_name(i["destination"]) if i.get("destination") else i["destination"]
+                    origin_city = resolve_city_name(i["origin"]) if i.get("origin") else i["origin"]
+                    dest_city = resolve_city_name(i["destination"]) if i.get("destination") else i["destination"]
                     
                     # Format date nicely
                     try:
-                        date_obj = datetime.fromisoformat(i["check_in"])
+                        date_obj = state.check_in_date or datetime.fromisoformat(i["check_in"])
                         date_str = date_obj.strftime("%B %d, %Y")
                     except Exception:
                         date_str = i["check_in"]
@@ -286,33 +444,38 @@ def flight_tool(state: AgentState):
                         "search_query": f"flights from {origin_city} to {dest_city} on {date_str} price"
                     }
         except Exception as inner_e:
-            print(f"Error parsing response: {inner_e}")
+            log.warning("Error parsing response: %s", inner_e)
         
-        print(f"{'='*70}\n")
+        log.debug(BANNER)
         return {"flights": [], "response": f"Flight search error: {str(e)}"}
         
     except Exception as e:
-        print(f"\n{'='*70}")
-        print("❌ UNEXPECTED ERROR")
-        print(f"{'='*70}")
-        import traceback
-        traceback.print_exc()
-        print(f"{'='*70}\n")
+        log.exception("❌ UNEXPECTED ERROR")
         return {"flights": [], "response": f"Unexpected flight error: {str(e)}"}
 
 
+@lru_cache(maxsize=4096)
+def resolve_city_name(iata_code: str) -> str:
+    """City name for an IATA code, memoized across requests"""
+    return get_airport_validator().get_city_name(iata_code)
+
+
+def resolve_city_names(iata_codes: Iterable[str]) -> Dict[str, str]:
+    """City names for a set of IATA codes, each distinct code resolved once"""
+    return {code: resolve_city_name(code) for code in set(iata_codes)}
+
+
 def get_fallback_message(state: AgentState):
     """Generic fallback message when web search also fails"""
     i = state.intent or {}
-    validator = get_airport_validator()
     
     try:
-        origin_city = validator.get_city_name(i.get('origin', '')) if i.get('origin') else 'departure city'
+        origin_city = resolve_city_name(i.get('origin', '')) if i.get('origin') else 'departure city'
     except Exception:
         origin_city = i.get('origin', 'departure city')
     
     try:
-        dest_city = validator.get_city_name(i.get('destination', '')) if i.get('destination') else 'destination city'
+        dest_city = resolve_city_name(i.get('destination', '')) if i.get('destination') else 'destination city'
     except Exception:
         dest_city = i.get('destination', 'destination city')
     
@@ -343,6 +506,53 @@ def get_fallback_message(state: AgentState):
 """
 
 
+WEB_RESULTS_FOOTER = """
+💡 **Recommendations:**
+- Visit the links above for real-time pricing and availability
+- Check airline websites directly for best deals
+- Compare prices on multiple booking platforms
+- The live API should be back online soon - try again later!
+
+⚠️ **Disclaimer:** The information above is from web search results and may not reflect current prices or availability. These are estimated options found on the internet.
+"""
+
+
+def format_web_results(search_query: str, flight_info: list) -> str:
+    """Markdown answer for web search results, shared by the SearXNG and DuckDuckGo paths"""
+    parts = [f"""
+⚠️ **Note: The live flight booking API is temporarily unavailable.**
+
+🔍 **Here's what I found from web search for "{search_query}":**
+
+"""]
+    for idx, info in enumerate(flight_info, 1):
+        snippet = info['snippet'][:200] if info['snippet'] else "No description available"
+        parts.append(f"""
+**{idx}. {info['title']}**
+{snippet}...
+🔗 {info['url']}
+
+""")
+    parts.append(WEB_RESULTS_FOOTER)
+    return "".join(parts)
+
+
+def fetch_searxng_results(searxng_url: str, params: dict):
+    """
+    The first WEB_RESULTS_LIMIT results from one SearXNG instance; raises if the instance
+    is down or not answering JSON. The body is parsed incrementally and the rest of a
+    long result list is never read.
+    """
+    log.debug("Trying SearXNG instance: %s", searxng_url)
+    with web_session.get(searxng_url, params=params, timeout=SEARXNG_TIMEOUT_SECONDS, stream=True) as response:
+        response.raise_for_status()
+        if ijson is None:
+            return response.json().get('results', [])[:WEB_RESULTS_LIMIT]
+
+        response.raw.decode_content = True
+        return list(islice(ijson.items(response.raw, 'results.item'), WEB_RESULTS_LIMIT))
+
+
 def web_search_fallback_node(state: AgentState):
     """Use SearXNG web search when Amadeus API is unavailable"""
     if not state.flights and state.use_web_search:
@@ -351,7 +561,7 @@ def web_search_fallback_node(state: AgentState):
         if not search_query:
             return {"response": "Unable to search for flights at this time."}
         
-        print(f"🔍 Performing web search: {search_query}")
+        log.debug("🔍 Performing web search: %s", search_query)
         
         # List of public SearXNG instances (fallback if one fails)
         searxng_instances = [
@@ -368,87 +578,63 @@ def web_search_fallback_node(state: AgentState):
             'language': 'en'
         }
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        # Try each SearXNG instance until one works
-        for searxng_url in searxng_instances:
-            try:
-                print(f"Trying SearXNG instance: {searxng_url}")
-                response = requests.get(searxng_url, params=params, headers=headers, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    results = data.get('results', [])
-                    
-                    print(f"✓ Success! Found {len(results)} results from {searxng_url}")
-                    
-                    if results:
-                        flight_info = []
-                        
-                        for idx, result in enumerate(results[:5], 1):
-                            title = result.get('title', 'No title')
-                            url = result.get('url', '')
-                            content = result.get('content', '')
-                            
-                            flight_info.append({
-                                'title': title,
-                                'url': url,
-                                'snippet': content
-                            })
-                        
-                        response_text = f"""
-⚠️ **Note: The live flight booking API is temporarily unavailable.**
+        # Query every SearXNG instance at once and take the first that returns results,
+        # instead of waiting out each dead instance's timeout in turn
+        executor = ThreadPoolExecutor(max_workers=len(searxng_instances))
+        try:
+            futures = {
+                executor.submit(fetch_searxng_results, searxng_url, params): searxng_url
+                for searxng_url in searxng_instances
+            }
+            for future in as_completed(futures):
+                searxng_url = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    log.warning("✗ Failed with %s: %s", searxng_url, e)
+                    continue
 
-🔍 **Here's what I found from web search for "{search_query}":**
+                log.debug("✓ Success! Found %s results from %s", len(results), searxng_url)
 
-"""
-                        for idx, info in enumerate(flight_info, 1):
-                            snippet = info['snippet'][:200] if info['snippet'] else "No description available"
-                            response_text += f"""
-**{idx}. {info['title']}**
-{snippet}...
-🔗 {info['url']}
+                if results:
+                    flight_info = []
 
-"""
-                        
-                        response_text += """
-💡 **Recommendations:**
-- Visit the links above for real-time pricing and availability
-- Check airline websites directly for best deals
-- Compare prices on multiple booking platforms
-- The live API should be back online soon - try again later!
+                    for idx, result in enumerate(results, 1):
+                        title = result.get('title', 'No title')
+                        url = result.get('url', '')
+                        content = result.get('content', '')
 
-⚠️ **Disclaimer:** The information above is from web search results and may not reflect current prices or availability. These are estimated options found on the internet.
-"""
-                        
-                        return {"response": response_text}
-                    
-            except Exception as e:
-                print(f"✗ Failed with {searxng_url}: {str(e)}")
-                continue  # Try next instance
+                        flight_info.append({
+                            'title': title,
+                            'url': url,
+                            'snippet': content
+                        })
+
+                    return {"response": format_web_results(search_query, flight_info)}
+        finally:
+            # Don't wait on the slower instances once we have an answer
+            executor.shutdown(wait=False, cancel_futures=True)
         
         # If all SearXNG instances fail, try DuckDuckGo as final fallback
-        print("All SearXNG instances failed, trying DuckDuckGo HTML search...")
+        log.debug("All SearXNG instances failed, trying DuckDuckGo HTML search...")
         try:
             ddg_url = "https://html.duckduckgo.com/html/"
             ddg_data = {
                 'q': search_query
             }
-            ddg_response = requests.post(ddg_url, data=ddg_data, headers=headers, timeout=10)
+            ddg_response = web_session.post(ddg_url, data=ddg_data, timeout=10)
             
             if ddg_response.status_code == 200:
-                print("✓ DuckDuckGo search successful")
+                log.debug("✓ DuckDuckGo search successful")
                 
-                soup = BeautifulSoup(ddg_response.text, 'html.parser')
-                results = soup.find_all('div', class_='result__body', limit=5)
+                soup = BeautifulSoup(ddg_response.content, 'lxml')
+                results = DDG_RESULT_SELECTOR.select(soup, limit=WEB_RESULTS_LIMIT)
                 
                 if results:
                     flight_info = []
                     for result in results:
-                        title_elem = result.find('a', class_='result__a')
-                        snippet_elem = result.find('a', class_='result__snippet')
+                        title_elem = DDG_TITLE_SELECTOR.select_one(result)
+                        snippet_elem = DDG_SNIPPET_SELECTOR.select_one(result)
                         
                         if title_elem:
                             title = title_elem.get_text(strip=True)
@@ -462,42 +648,30 @@ def web_search_fallback_node(state: AgentState):
                             })
                     
                     if flight_info:
-                        response_text = f"""
-⚠️ **Note: The live flight booking API is temporarily unavailable.**
-
-🔍 **Here's what I found from web search for "{search_query}":**
-
-"""
-                        for idx, info in enumerate(flight_info, 1):
-                            snippet = info['snippet'][:200] if info['snippet'] else "No description available"
-                            response_text += f"""
-**{idx}. {info['title']}**
-{snippet}...
-🔗 {info['url']}
-
-"""
-                        
-                        response_text += """
-💡 **Recommendations:**
-- Visit the links above for real-time pricing and availability
-- Check airline websites directly for best deals
-- Compare prices on multiple booking platforms
-- The live API should be back online soon - try again later!
-
-⚠️ **Disclaimer:** The information above is from web search results and may not reflect current prices or availability. These are estimated options found on the internet.
-"""
-                        
-                        return {"response": response_text}
+                        return {"response": format_web_results(search_query, flight_info)}
         except Exception as e:
-            print(f"✗ DuckDuckGo fallback also failed: {str(e)}")
+            log.warning("✗ DuckDuckGo fallback also failed: %s", e)
         
         # If everything fails, return generic fallback
-        print("All search methods failed, returning generic fallback")
+        log.debug("All search methods failed, returning generic fallback")
         return {"response": get_fallback_message(state)}
     
     return {}
 
 
+def fetch_hotel_offers(hotel_id: str, travelers: int, check_in: str, check_out: str):
+    """Offers for one hotel, backing off and retrying when Amadeus rate-limits us"""
+    for attempt in range(HOTEL_OFFER_RETRIES):
+        try:
+            return amadeus_service.search_hotel_offers(hotel_id, travelers, check_in, check_out)
+        except ResponseError as e:
+            if "429" not in str(e) or attempt == HOTEL_OFFER_RETRIES - 1:
+                raise
+            delay = min(HOTEL_OFFER_MAX_BACKOFF_SECONDS, HOTEL_OFFER_BACKOFF_SECONDS * 2 ** attempt)
+            log.warning("⏸️  Rate limited on %s, retrying in %.1fs...", hotel_id, delay)
+            time.sleep(delay + random.uniform(0, 0.25))
+
+
 def hotel_tool(state: AgentState):
     if state.intent is None: 
         return {"response": "Internal error: missing intent"}
@@ -510,62 +684,75 @@ def hotel_tool(state: AgentState):
         return {"hotels": [], "response": "Missing check-in or check-out dates for hotel search"}
 
     try:
-        print(f"\n{'='*70}")
-        print("HOTEL SEARCH DEBUG - START")
-        print(f"{'='*70}")
-        print(f"Step 1: Getting hotels in city: {i['destination']}")
+        log.debug(BANNER)
+        log.debug("HOTEL SEARCH DEBUG - START")
+        log.debug(BANNER)
+        log.debug("Step 1: Getting hotels in city: %s", i['destination'])
         
         hotels_data = amadeus_service.search_hotels_by_city(i['destination'])
         
         if not hotels_data:
-            print(f"❌ No hotels found in city: {i['destination']}")
+            log.warning("❌ No hotels found in city: %s", i['destination'])
             return {"hotels": [], "response": f"No hotels found in city: {i['destination']}"}
         
-        print(f"✅ Found {len(hotels_data)} hotels in {i['destination']}")
+        log.debug("✅ Found %s hotels in %s", len(hotels_data), i['destination'])
         
-        hotelIds = [hotel['hotelId'] for hotel in hotels_data[:30] if 'hotelId' in hotel]
+        hotelIds = [hotel['hotelId'] for hotel in hotels_data[:HOTEL_OFFER_CANDIDATES] if 'hotelId' in hotel]
         
         if not hotelIds:
-            print("❌ Could not extract hotel IDs")
+            log.warning("❌ Could not extract hotel IDs")
             return {"hotels": [], "response": "Could not extract hotel IDs"}
         
-        print(f"Step 2: Searching offers for {len(hotelIds)} hotel IDs")
-        print(f"{'='*70}\n")
+        log.debug("Step 2: Searching offers for %s hotel IDs", len(hotelIds))
+        log.debug(BANNER)
         
-        valid_offers = []
-        
-        for hotel_id in hotelIds:
-            try:
-                offer_data = amadeus_service.search_hotel_offers(
-                    hotel_id,
-                    i['travelers'],
-                    i['check_in'],
-                    i['check_out']
-                )
+        # Offer lookups are independent HTTPS round-trips - run them concurrently instead of
+        # paying one RTT per hotel. We stop once the leading hotels of the city listing are all
+        # answered and hold enough offers, so the result doesn't depend on which lookups finish first.
+        offers_by_hotel = {}
+        prefix_len = 0  # hotelIds[:prefix_len] are all answered
+        prefix_found = 0  # offers among them
+        executor = ThreadPoolExecutor(max_workers=HOTEL_OFFER_WORKERS)
+        try:
+            futures = {
+                executor.submit(fetch_hotel_offers, hotel_id, i['travelers'], i['check_in'], i['check_out']): hotel_id
+                for hotel_id in hotelIds
+            }
+            for future in as_completed(futures):
+                hotel_id = futures[future]
+                try:
+                    offer_data = future.result()
+                except ResponseError as e:
+                    log.warning("✗ Skipping %s: %s", hotel_id, e)
+                    offer_data = []
+                offers_by_hotel[hotel_id] = offer_data or []
                 if offer_data:
-                    valid_offers.extend(offer_data)
-                    print(f"  ✓ Found offers for {hotel_id}")
-                    
-                    if len(valid_offers) >= 5:
-                        break
-            except ResponseError as e:
-                error_code = str(e)
-                if "429" in error_code:
-                    print("  ⏸️  Rate limited, waiting...")
-                    import time
-                    time.sleep(0.5)
-                else:
-                    print(f"  ✗ Skipping {hotel_id}: {error_code}")
-                continue
+                    log.debug("✓ Found offers for %s", hotel_id)
+
+                while (
+                    prefix_found < HOTEL_OFFER_TARGET
+                    and prefix_len < len(hotelIds)
+                    and hotelIds[prefix_len] in offers_by_hotel
+                ):
+                    prefix_found += len(offers_by_hotel[hotelIds[prefix_len]])
+                    prefix_len += 1
+                if prefix_found >= HOTEL_OFFER_TARGET:
+                    break
+        finally:
+            # Drop lookups that haven't started; in-flight ones finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Only the answered prefix, in the city listing's order
+        valid_offers = [offer for hotel_id in hotelIds[:prefix_len] for offer in offers_by_hotel[hotel_id]]
         
         if valid_offers:
-            print(f"\n✅ Successfully found {len(valid_offers)} hotel offers")
-            print(f"{'='*70}\n")
+            log.debug("✅ Successfully found %s hotel offers", len(valid_offers))
+            log.debug(BANNER)
             return {"hotels": valid_offers}
         else:
             # Fallback: return basic hotel info without offers
-            print("\n⚠️  No offers found, returning basic hotel information")
-            print(f"{'='*70}\n")
+            log.warning("⚠️  No offers found, returning basic hotel information")
+            log.debug(BANNER)
             basic_hotels = []
             for hotel in hotels_data[:5]:
                 basic_hotels.append({
@@ -584,17 +771,19 @@ def hotel_tool(state: AgentState):
             
     except ResponseError as e:
         error_msg = str(e)
-        print(f"\n❌ Amadeus ResponseError: {error_msg}")
-        print(f"{'='*70}\n")
+        log.warning("❌ Amadeus ResponseError: %s", error_msg)
+        log.debug(BANNER)
         return {"hotels": [], "response": f"Hotel search error: {error_msg}"}
     except Exception as e:
-        print("\n❌ UNEXPECTED ERROR")
-        import traceback
-        traceback.print_exc()
-        print(f"{'='*70}\n")
+        log.exception("❌ UNEXPECTED ERROR")
         return {"hotels": [], "response": f"Unexpected hotel error: {str(e)}"}
 
 
+def merge_results_node(state: AgentState):
+    """Join point for the parallel flight/hotel tools - the results are already in state"""
+    return {}
+
+
 def clarify_node(state: AgentState):
     """Provide helpful clarification when information is missing"""
     
@@ -665,13 +854,27 @@ def clarify_node(state: AgentState):
     return {"response": response}
 
 def synthesis_node(state: AgentState):
+    if not state.flights and not state.hotels:
+        return {"response": "No results available for your search."}
+
     lines = []
-    validator = get_airport_validator()
     
     # Handle flights
     if state.flights:
         lines.append("✈️ **FLIGHTS:**")
-        for f in state.flights[:5]:
+
+        # Resolve every departure/arrival city up front instead of two lookups per flight
+        flights = state.flights[:5]
+        city_names = resolve_city_names(
+            code
+            for f in flights
+            for code in (
+                f["itineraries"][0]["segments"][0]["departure"]["iataCode"],
+                f["itineraries"][0]["segments"][-1]["arrival"]["iataCode"],
+            )
+        )
+
+        for f in flights:
             # Get the ENTIRE itinerary, not just first segment
             itinerary = f["itineraries"][0]
             segments = itinerary["segments"]
@@ -687,7 +890,7 @@ def synthesis_node(state: AgentState):
             dt = datetime.fromisoformat(first_segment["departure"]["at"])
             if dt.tzinfo is not None:
                 dt = dt.replace(tzinfo=None) 
-            time_str = dt.strftime("%d %b %Y, %I:%M %p")
+            time_str = dt.strftime(FLIGHT_TIME_FORMAT)
 
             # Get price
             price_eur = float(f["price"]["total"])
@@ -697,8 +900,8 @@ def synthesis_node(state: AgentState):
             dep_code = first_segment["departure"]["iataCode"]
             arr_code = last_segment["arrival"]["iataCode"]  # Use LAST segment's arrival!
 
-            dep_city = validator.get_city_name(dep_code)
-            arr_city = validator.get_city_name(arr_code)
+            dep_city = city_names[dep_code]
+            arr_city = city_names[arr_code]
 
             route_str = f"{dep_city} ({dep_code}) → {arr_city} ({arr_code})"
             
@@ -730,21 +933,12 @@ def synthesis_node(state: AgentState):
                 
                 price_info = offer.get('price', {})
                 currency = price_info.get('currency', 'EUR')
-                total = float(price_info.get('total', 0))
-                base = float(price_info.get('base', 0))
+                total = float(price_info.get('total') or 0)
+                base = float(price_info.get('base') or 0)
                 
-                if currency == 'EUR':
-                    price_inr = int(total * EUR_TO_INR)
-                    base_inr = int(base * EUR_TO_INR)
-                elif currency == 'GBP':
-                    price_inr = int(total * 125)
-                    base_inr = int(base * 125)
-                elif currency == 'USD':
-                    price_inr = int(total * 83)
-                    base_inr = int(base * 83)
-                else:
-                    price_inr = int(total)
-                    base_inr = int(base)
+                rate = CURRENCY_TO_INR.get(currency, 1)
+                price_inr = int(total * rate)
+                base_inr = int(base * rate)
                 
                 lines.append(f"   💰 Price: ₹{price_inr} total (Base: ₹{base_inr}) | Currency: {currency}")
                 
@@ -795,7 +989,4 @@ def synthesis_node(state: AgentState):
                 
             lines.append("")
     
-    if not lines:
-        return {"response": "No results available for your search."}
-    
     return {"response": "\n".join(lines)}
\ No newline at end of file
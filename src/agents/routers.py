@@ -1,35 +1,23 @@
 from src.models.state import AgentState
 
 
-def router(state: AgentState):
-    if state.intent is None:
-        return "clarify"
-
-    intent = state.intent["intent"]
+# intent -> next node(s); "both" fans out to the independent flight and hotel tools in parallel
+ROUTER_TABLE = {
+    "flight_search": "flight_tool",
+    "hotel_search": "hotel_tool",
+    "both": ("flight_tool", "hotel_tool"),
+    "follow_up": "synthesis",
+}
 
-    if intent == "flight_search":
-        return "flight_tool"
-    if intent == "hotel_search":
-        return "hotel_tool"
-    if intent == "both":
-        return "flight_tool"
-    if intent == "follow_up":
-        return "synthesis"
 
-    return "clarify"
+def router(state: AgentState):
+    intent = state.intent.get("intent") if state.intent else None
+    return ROUTER_TABLE.get(intent, "clarify")
 
 
-def flight_tool_router(state: AgentState):
+def tools_router(state: AgentState):
     # Check if we need to use web search fallback
     if state.use_web_search:
         return "web_search_fallback"
 
-    if state.intent is None:
-        return "synthesis"
-
-    intent = state.intent["intent"]
-
-    if intent == "both":
-        return "hotel_tool"
-
     return "synthesis"
@@ -1,95 +1,232 @@
-from fastapi import APIRouter, HTTPException
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
 
-from src.models.schemas import QueryRequest, QueryResponse
+import orjson
+from fastapi import APIRouter, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from src.models.schemas import BatchQueryRequest, QueryRequest, QueryResponse, Session
 from src.models.state import AgentState
 from src.services.session_service import session_service
 from src.utils.validators import QueryValidator
-from src.agents.graph import agent
+from src.agents.graph import get_agent
+from src.utils.cache import replay_cache
+from src.config.settings import MAX_BATCH_QUERIES, MAX_HISTORY_TURNS
+
 
+log = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _sanitize_query(query: str) -> str:
+    """Validate and sanitize a user query, rejecting it with a 400"""
+    try:
+        return QueryValidator.sanitize_query(query)
+    except ValueError as e:
+        log.info("Input validation failed: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _load_session(session_id: Optional[str]) -> Session:
+    """Validate the session ID if provided, then get or create the session"""
+    if session_id and not QueryValidator.validate_session_id(session_id):
+        raise HTTPException(status_code=400, detail="Invalid session ID format")
+
+    return await session_service.get_or_create_session(session_id)
+
+
+async def _start_turn(req: QueryRequest) -> Tuple[Session, AgentState]:
+    """Validate the request and build the initial agent state; the session is only updated by _finish_turn"""
+    sanitized_query = _sanitize_query(req.query)
+    session = await _load_session(req.session_id)
+
+    # Create agent state - the history it sees includes the new user query
+    initial_state = AgentState(
+        query=sanitized_query,
+        conversation_history=session.conversation_history + [{"role": "user", "content": sanitized_query}],
+        previous_intent=session.last_intent,
+    )
+
+    return session, initial_state
+
+
+async def _finish_turn(session: Session, query: str, result: Dict[str, Any]) -> QueryResponse:
+    """Record the user and assistant turns and build the API response from the final agent state"""
+    if not result.get("response"):
+        raise HTTPException(status_code=500, detail="Agent execution failed")
+
+    # Add the user query and assistant response to history
+    session.conversation_history.append(
+        {
+            "role": "user",
+            "content": query,
+        }
+    )
+    session.conversation_history.append(
+        {
+            "role": "assistant",
+            "content": result["response"],
+        }
+    )
+    # Drop the oldest turns past the cap, in place
+    del session.conversation_history[:-MAX_HISTORY_TURNS * 2]
+    session.turn_count += 1
+
+    # Update session with last results
+    session.last_intent = result.get("intent")
+    session.last_flights = result.get("flights")
+    session.last_hotels = result.get("hotels")
+
+    # Save session
+    await session_service.update_session(session)
+
+    # Built from our own session and agent state, so skip validation. The history is copied
+    # because the session keeps appending to its list (replays and batch responses keep theirs).
+    return QueryResponse.model_construct(
+        answer=result["response"],
+        session_id=session.session_id,
+        intent=result.get("intent"),
+        used_flight_api=bool(result.get("flights")),
+        used_hotel_api=bool(result.get("hotels")),
+        conversation_history=list(session.conversation_history),
+        turn_count=session.turn_count,
+    )
+
+
 @router.post("/query", response_model=QueryResponse)
-def query_agent(req: QueryRequest):
+async def query_agent(req: QueryRequest):
+    replay = replay_cache.get(req.request_id)
+    if replay is not None:
+        return replay
+
     try:
-        # Validate and sanitize input
+        session, initial_state = await _start_turn(req)
+
+        # Run agent - sync nodes run on the event loop's executor, so the loop stays free
+        result = await get_agent().ainvoke(initial_state)
+
+        response = await _finish_turn(session, initial_state.query, result)
+        replay_cache.set(req.request_id, response)
+        return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("Query failed")
+        raise HTTPException(status_code=500, detail=f"Error: {e}")
+
+
+@router.post("/query/stream")
+async def query_agent_stream(req: QueryRequest):
+    """
+    Same as /query, but streams NDJSON frames while the agent runs:
+    one {"node", "response"} frame per completed graph node, then a final
+    {"done": true, ...QueryResponse} frame (or {"error": ...} on failure)
+    """
+    replay = replay_cache.get(req.request_id)
+    if replay is not None:
+        done = orjson.dumps({"done": True, **replay.model_dump()}) + b"\n"
+        return StreamingResponse(iter([done]), media_type="application/x-ndjson")
+
+    session, initial_state = await _start_turn(req)
+
+    async def frames():
         try:
-            sanitized_query = QueryValidator.sanitize_query(req.query)
-        except ValueError as e:
-            print(f"Input validation failed: {e}")
-            raise HTTPException(status_code=400, detail=str(e))
-
-        # Validate session ID if provided
-        if req.session_id and not QueryValidator.validate_session_id(req.session_id):
-            raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-        # Get or create session
-        session = session_service.get_or_create_session(req.session_id)
-
-        # Add user query to history
-        session.conversation_history.append(
-            {
-                "role": "user",
-                "content": sanitized_query,
-            }
-        )
-
-        # Create agent state
-        initial_state = AgentState(
-            query=sanitized_query,
-            conversation_history=session.conversation_history,
-        )
+            result: Dict[str, Any] = {}
+            async for mode, chunk in get_agent().astream(initial_state, stream_mode=["updates", "values"]):
+                if mode == "values":
+                    result = chunk
+                    continue
+                for node, update in chunk.items():
+                    frame = {"node": node, "response": (update or {}).get("response")}
+                    yield orjson.dumps(frame) + b"\n"
+
+            final = await _finish_turn(session, initial_state.query, result)
+            replay_cache.set(req.request_id, final)
+            yield orjson.dumps({"done": True, **final.model_dump()}) + b"\n"
+
+        except Exception as e:
+            if not isinstance(e, HTTPException):
+                log.exception("Streamed query failed")
+            detail = e.detail if isinstance(e, HTTPException) else f"Error: {e}"
+            yield orjson.dumps({"error": detail}) + b"\n"
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+
+@router.post("/query/batch", response_model=List[QueryResponse])
+async def query_agent_batch(req: BatchQueryRequest):
+    """
+    Several queued turns for one session in a single call. The agent runs them
+    concurrently, each seeing the history as of the start of the batch, and the
+    turns are recorded in order. One QueryResponse per query, aligned with req.queries.
+    """
+    if not req.queries or len(req.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {MAX_BATCH_QUERIES} queries")
+
+    replay = replay_cache.get(req.request_id)
+    if replay is not None:
+        return replay
+
+    try:
+        queries = [_sanitize_query(query) for query in req.queries]
+        session = await _load_session(req.session_id)
+
+        history = list(session.conversation_history)
+        states = [
+            AgentState(
+                query=query,
+                conversation_history=history + [{"role": "user", "content": query}],
+                previous_intent=session.last_intent,
+            )
+            for query in queries
+        ]
 
         # Run agent
-        result = agent.invoke(initial_state)
-
-        if not result.get("response"):
-            raise HTTPException(status_code=500, detail="Agent execution failed")
-
-        # Add assistant response to history
-        session.conversation_history.append(
-            {
-                "role": "assistant",
-                "content": result["response"],
-            }
-        )
-
-        # Update session with last results
-        session.last_intent = result.get("intent")
-        session.last_flights = result.get("flights")
-        session.last_hotels = result.get("hotels")
-
-        # Save session
-        session_service.update_session(session)
-
-        return QueryResponse(
-            answer=result["response"],
-            session_id=session.session_id,
-            intent=result.get("intent"),
-            used_flight_api=bool(result.get("flights")),
-            used_hotel_api=bool(result.get("hotels")),
-            conversation_history=session.conversation_history,
-        )
+        results = await get_agent().abatch(states)
 
-    except Exception as e:
-        import traceback
+        responses = []
+        for query, result in zip(queries, results):
+            responses.append(await _finish_turn(session, query, result))
+        replay_cache.set(req.request_id, responses)
+        return responses
 
-        traceback.print_exc()
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("Query failed")
         raise HTTPException(status_code=500, detail=f"Error: {e}")
 
 
+def _session_etag(session: Session) -> str:
+    """
+    Weak ETag for a stored session. A session only changes by recording a turn,
+    so its id, creation time and turn count identify the version without
+    serializing the body.
+    """
+    version = f"{session.session_id}:{session.created_at}:{session.turn_count}"
+    return f'W/"{hashlib.md5(version.encode()).hexdigest()}"'
+
+
 @router.get("/session/{session_id}")
-def get_session(session_id: str):
-    session = session_service.get_session(session_id)
+async def get_session(session_id: str, if_none_match: Optional[str] = Header(default=None)):
+    session = await session_service.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    return session
+
+    # Conditional poll: unchanged sessions get an empty 304 instead of the full transcript
+    etag = _session_etag(session)
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return Response(content=session.dump_json(), media_type="application/json", headers={"ETag": etag})
 
 
 @router.delete("/session/{session_id}")
-def clear_session(session_id: str):
-    if session_service.delete_session(session_id):
+async def clear_session(session_id: str):
+    if await session_service.delete_session(session_id):
         return {"message": "Session cleared"}
 
     raise HTTPException(status_code=404, detail="Session not found")
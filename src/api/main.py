@@ -1,9 +1,14 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.config.settings import API_TITLE, CORS_ORIGINS
+from src.config.settings import API_TITLE, CORS_ORIGINS, LOG_LEVEL
 from src.api.endpoints import router
+from src.agents.graph import get_agent
+
 
+logging.basicConfig(level=LOG_LEVEL, format="%(levelname)s %(name)s: %(message)s")
 
 app = FastAPI(title=API_TITLE)
 
@@ -22,6 +27,9 @@ app.include_router(router)
 
 @app.on_event("startup")
 async def startup_event():
+    # Compile the agent graph up front so the first /query doesn't pay for it
+    get_agent()
+
     print("\n" + "="*70)
     print("🚀 TRAVIA TRAVEL ASSISTANT - BACKEND STARTED")
     print("="*70)
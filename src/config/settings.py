@@ -6,18 +6,62 @@ load_dotenv()
 # Amadeus Configuration
 AMADEUS_CLIENT_ID = os.environ.get("AMADEUS_CLIENT_ID")
 AMADEUS_CLIENT_SECRET = os.environ.get("AMADEUS_CLIENT_SECRET")
+# Keep-alive connections kept open to Amadeus; at least as many as concurrent hotel offer lookups
+AMADEUS_POOL_SIZE = 10
 
 # LLM Configuration
 OLLAMA_MODEL = "llama3.2:3b"
 OLLAMA_BASE_URL = "http://127.0.0.1:11434"
 OLLAMA_TEMPERATURE = 0
 
+# Rules-based fast path for simple follow-ups ("how about tomorrow?") that skips the intent LLM
+FAST_INTENT = os.environ.get("FAST_INTENT") == "1"
+
+# Logging - set LOG_LEVEL=DEBUG to see the per-search debug output from the tool nodes
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+
 # API Configuration
 API_TITLE = "Agentic Travel Assistant (Local LLM)"
 API_PORT = 8000
 
+# Most queued turns accepted by /query/batch
+MAX_BATCH_QUERIES = 4
+
+# Sessions keep only the last MAX_HISTORY_TURNS user/assistant exchanges, so the history echoed
+# in every response (and rebuilt into the agent state) stays a fixed size over a long chat
+MAX_HISTORY_TURNS = 20
+
+# Session storage - set REDIS_URL (e.g. redis://localhost:6379/0) to share sessions between
+# uvicorn workers and keep them across restarts; unset keeps them in process memory
+REDIS_URL = os.environ.get("REDIS_URL")
+SESSION_TTL_SECONDS = 3600
+
 # CORS Configuration
 CORS_ORIGINS = ["*"]
 
 # Currency Conversion
-EUR_TO_INR = 107.19
\ No newline at end of file
+EUR_TO_INR = 107.19
+GBP_TO_INR = 125
+USD_TO_INR = 83
+# Hotel offer currency -> INR rate; prices in any other currency are shown as-is
+CURRENCY_TO_INR = {"EUR": EUR_TO_INR, "GBP": GBP_TO_INR, "USD": USD_TO_INR}
+
+# Amadeus lookup caches (per process)
+HOTELS_BY_CITY_CACHE_TTL_SECONDS = 60 * 60
+HOTELS_BY_CITY_CACHE_MAX_ENTRIES = 512
+HOTEL_OFFERS_CACHE_TTL_SECONDS = 5 * 60
+HOTEL_OFFERS_CACHE_MAX_ENTRIES = 4096
+FLIGHT_OFFERS_CACHE_TTL_SECONDS = 5 * 60
+FLIGHT_OFFERS_CACHE_MAX_ENTRIES = 1024
+LOCATION_INFO_CACHE_TTL_SECONDS = 24 * 60 * 60
+LOCATION_INFO_CACHE_MAX_ENTRIES = 1024
+
+# Tool Result Cache (flight/hotel searches keyed by intent, persisted on disk across restarts)
+TOOL_CACHE_DIR = os.environ.get("TRAVIA_CACHE_DIR", os.path.expanduser("~/.cache/travia/amadeus"))
+# Same lifetime as the per-call offer caches above - a persisted search is no staler than its offers
+TOOL_CACHE_TTL_SECONDS = 5 * 60
+TOOL_CACHE_SIZE_LIMIT = 2 ** 30
+
+# Retried POSTs carrying the same request_id are answered from here instead of re-running the agent
+REQUEST_REPLAY_TTL_SECONDS = 10 * 60
+REQUEST_REPLAY_MAX_ENTRIES = 1024
@@ -1,5 +1,6 @@
 from typing import Optional, Literal, Dict, Any, List
 from datetime import datetime
+import orjson
 from pydantic import BaseModel, Field
 
 
@@ -19,12 +20,30 @@ class Session(BaseModel):
     last_intent: Optional[Dict[str, Any]] = None
     last_flights: Optional[List[Dict[str, Any]]] = None
     last_hotels: Optional[List[Dict[str, Any]]] = None
+    # Turns recorded so far; conversation_history is capped, so its length stops changing
+    turn_count: int = 0
     created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
 
+    def dump_json(self) -> bytes:
+        """
+        JSON for storage and GET /session. Every field already holds plain JSON types, so the
+        shallow field dict goes straight to orjson instead of model_dump() walking the history
+        and the stored search results on every turn.
+        """
+        return orjson.dumps(dict(self))
+
 
 class QueryRequest(BaseModel):
     query: str
     session_id: Optional[str] = None
+    # Client-generated idempotency key; a retried request with the same id gets the original response
+    request_id: Optional[str] = None
+
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    session_id: Optional[str] = None
+    request_id: Optional[str] = None
 
 
 class QueryResponse(BaseModel):
@@ -33,4 +52,6 @@ class QueryResponse(BaseModel):
     intent: Optional[Dict[str, Any]]
     used_flight_api: bool
     used_hotel_api: bool
-    conversation_history: List[Dict[str, str]]
\ No newline at end of file
+    conversation_history: List[Dict[str, str]]
+    # The session's turn_count after this turn - the conversation position the answer belongs to
+    turn_count: int = 0
\ No newline at end of file
@@ -1,13 +1,27 @@
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Annotated, Optional, Dict, Any, List
 
 
-class AgentState(BaseModel):
+def _latest(_current: Optional[str], update: Optional[str]) -> Optional[str]:
+    # flight_tool and hotel_tool can both set a response in the same (parallel) step
+    return update
+
+
+@dataclass(slots=True)
+class AgentState:
+    # A plain slotted dataclass: LangGraph rebuilds the state from its channels before every
+    # node, and everything in it is produced by the endpoint and the nodes themselves, so there
+    # is nothing to validate. Requests are validated at the API boundary (QueryRequest).
     query: str
-    conversation_history: List[Dict[str, str]] = []
+    conversation_history: List[Dict[str, str]] = field(default_factory=list)
     intent: Optional[Dict[str, Any]] = None
+    # The session's last intent, for follow-ups that only tweak it
+    previous_intent: Optional[Dict[str, Any]] = None
+    # intent["check_in"] parsed by intent_node
+    check_in_date: Optional[datetime] = None
     flights: Optional[List[Dict[str, Any]]] = None
     hotels: Optional[List[Dict[str, Any]]] = None
-    response: Optional[str] = None
+    response: Annotated[Optional[str], _latest] = None
     use_web_search: bool = False
-    search_query: Optional[str] = None
\ No newline at end of file
+    search_query: Optional[str] = None
@@ -1,63 +1,152 @@
 import os
-from amadeus import Client, ResponseError
+import threading
+from urllib.error import URLError
+
+import requests
+from amadeus import Client
+from cachetools import TTLCache
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from src.config.settings import (
+    AMADEUS_POOL_SIZE,
+    FLIGHT_OFFERS_CACHE_MAX_ENTRIES,
+    FLIGHT_OFFERS_CACHE_TTL_SECONDS,
+    HOTEL_OFFERS_CACHE_MAX_ENTRIES,
+    HOTEL_OFFERS_CACHE_TTL_SECONDS,
+    HOTELS_BY_CITY_CACHE_MAX_ENTRIES,
+    HOTELS_BY_CITY_CACHE_TTL_SECONDS,
+    LOCATION_INFO_CACHE_MAX_ENTRIES,
+    LOCATION_INFO_CACHE_TTL_SECONDS,
+)
 
 load_dotenv()
 
 
+class PooledResponse:
+    """The parts of urlopen's response the Amadeus SDK reads: status, headers and body"""
+
+    def __init__(self, response: requests.Response):
+        self.status = response.status_code
+        self.response = response
+
+    def info(self):
+        return self.response.headers
+
+    def read(self) -> bytes:
+        return self.response.content
+
+
+class PooledTransport:
+    """
+    urlopen-compatible transport for the Amadeus SDK (its `http` option) over one pooled
+    requests.Session, so calls reuse keep-alive TLS connections instead of opening a new one
+    per request. Error statuses are returned like urlopen's HTTPError, for the SDK to raise.
+    """
+
+    def __init__(self, pool_size: int = AMADEUS_POOL_SIZE):
+        self.session = requests.Session()
+        # hotel_tool fetches offers from several threads at once
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    def __call__(self, http_request) -> PooledResponse:
+        try:
+            response = self.session.request(
+                http_request.get_method(),
+                http_request.full_url,
+                headers=dict(http_request.header_items()),
+                data=http_request.data,
+            )
+        except requests.RequestException as e:
+            # The SDK turns URLError into its NetworkError
+            raise URLError(e)
+        return PooledResponse(response)
+
+
 class AmadeusService:
     def __init__(self):
         self.client = Client(
             client_id=os.environ["AMADEUS_CLIENT_ID"],
             client_secret=os.environ["AMADEUS_CLIENT_SECRET"],
+            http=PooledTransport(),
+        )
+        # Lookups are cached per method so repeat searches don't spend the rate limit again:
+        # offers briefly, city hotel lists and locations for longer since they change slowly.
+        # TTLCache evicts least recently used entries when full. Tools call in from several threads.
+        self.flight_offers_cache: TTLCache = TTLCache(
+            maxsize=FLIGHT_OFFERS_CACHE_MAX_ENTRIES, ttl=FLIGHT_OFFERS_CACHE_TTL_SECONDS
+        )
+        self.hotels_by_city_cache: TTLCache = TTLCache(
+            maxsize=HOTELS_BY_CITY_CACHE_MAX_ENTRIES, ttl=HOTELS_BY_CITY_CACHE_TTL_SECONDS
+        )
+        self.hotel_offers_cache: TTLCache = TTLCache(
+            maxsize=HOTEL_OFFERS_CACHE_MAX_ENTRIES, ttl=HOTEL_OFFERS_CACHE_TTL_SECONDS
         )
+        self.location_info_cache: TTLCache = TTLCache(
+            maxsize=LOCATION_INFO_CACHE_MAX_ENTRIES, ttl=LOCATION_INFO_CACHE_TTL_SECONDS
+        )
+        self.cache_lock = threading.Lock()
+    
+    def _cached_call(self, cache: TTLCache, key, fetch, cache_empty: bool = True):
+        """Return fetch().data from cache, calling Amadeus on a miss; ResponseErrors are never cached"""
+        with self.cache_lock:
+            cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        data = fetch().data
+
+        if data or cache_empty:
+            with self.cache_lock:
+                cache[key] = data
+        return data
     
     def search_flights(self, origin: str, destination: str, departure_date: str, adults: int):
         """Search for flights"""
-        try:
-            res = self.client.shopping.flight_offers_search.get(
+        return self._cached_call(
+            self.flight_offers_cache,
+            (origin, destination, departure_date, adults),
+            lambda: self.client.shopping.flight_offers_search.get(
                 originLocationCode=origin,
                 destinationLocationCode=destination,
                 departureDate=departure_date,
                 adults=adults,
-            )
-            return res.data
-        except ResponseError as e:
-            raise e
+            ),
+        )
     
     def search_hotels_by_city(self, city_code: str):
         """Get hotels in a city"""
-        try:
-            hotels_by_city = self.client.reference_data.locations.hotels.by_city.get(
-                cityCode=city_code
-            )
-            return hotels_by_city.data
-        except ResponseError as e:
-            raise e
+        return self._cached_call(
+            self.hotels_by_city_cache,
+            city_code,
+            lambda: self.client.reference_data.locations.hotels.by_city.get(cityCode=city_code),
+            cache_empty=False,
+        )
     
     def search_hotel_offers(self, hotel_id: str, adults: int, check_in: str, check_out: str):
         """Search for hotel offers"""
-        try:
-            offer = self.client.shopping.hotel_offers_search.get(
+        return self._cached_call(
+            self.hotel_offers_cache,
+            (hotel_id, adults, check_in, check_out),
+            lambda: self.client.shopping.hotel_offers_search.get(
                 hotelIds=hotel_id,
                 adults=adults,
                 checkInDate=check_in,
                 checkOutDate=check_out
-            )
-            return offer.data
-        except ResponseError as e:
-            raise e
+            ),
+        )
     
     def get_location_info(self, keyword: str, sub_type: str = "AIRPORT"):
         """Get location information"""
-        try:
-            loc = self.client.reference_data.locations.get(
+        return self._cached_call(
+            self.location_info_cache,
+            (keyword, sub_type),
+            lambda: self.client.reference_data.locations.get(
                 keyword=keyword,
                 subType=sub_type
-            )
-            return loc.data
-        except ResponseError as e:
-            raise e
+            ),
+            cache_empty=False,
+        )
 
 
 # Global instance
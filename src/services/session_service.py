@@ -1,33 +1,80 @@
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Optional
+
+import orjson
+
+from src.config.settings import REDIS_URL, SESSION_TTL_SECONDS
 from src.models.schemas import Session
 
 
 class SessionService:
+    """
+    In-process session store. Methods are async to share one interface with RedisSessionService,
+    which the async endpoints await without blocking the event loop.
+    """
+
     def __init__(self):
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+        # Live Session objects - requests mutate them in place, nothing is re-serialized per turn
+        self.sessions: Dict[str, Session] = {}
     
-    def get_or_create_session(self, session_id: Optional[str] = None) -> Session:
+    async def get_or_create_session(self, session_id: Optional[str] = None) -> Session:
         if session_id and session_id in self.sessions:
-            return Session(**self.sessions[session_id])
+            return self.sessions[session_id]
         
         new_session_id = session_id or str(uuid.uuid4())
         session = Session(session_id=new_session_id)
-        self.sessions[new_session_id] = session.model_dump()
+        self.sessions[new_session_id] = session
         return session
     
-    def update_session(self, session: Session):
-        self.sessions[session.session_id] = session.model_dump()
+    async def update_session(self, session: Session):
+        self.sessions[session.session_id] = session
     
-    def delete_session(self, session_id: str) -> bool:
+    async def delete_session(self, session_id: str) -> bool:
         if session_id in self.sessions:
             del self.sessions[session_id]
             return True
         return False
     
-    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+    async def get_session(self, session_id: str) -> Optional[Session]:
         return self.sessions.get(session_id)
 
 
+class RedisSessionService:
+    """
+    Same interface as SessionService, backed by Redis so every uvicorn worker sees the same
+    sessions. Sessions are stored as orjson and expire SESSION_TTL_SECONDS after their last turn.
+    """
+
+    KEY_PREFIX = "sess:"
+
+    def __init__(self, url: str, ttl_seconds: int = SESSION_TTL_SECONDS):
+        import redis.asyncio  # optional - only needed when REDIS_URL is set
+
+        self.redis = redis.asyncio.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    async def get_or_create_session(self, session_id: Optional[str] = None) -> Session:
+        if session_id:
+            session = await self.get_session(session_id)
+            if session:
+                return session
+
+        # Saved on the first update_session, like a new in-memory session that never finishes a turn
+        return Session(session_id=session_id or str(uuid.uuid4()))
+
+    async def update_session(self, session: Session):
+        await self.redis.set(self.KEY_PREFIX + session.session_id, session.dump_json(), ex=self.ttl_seconds)
+
+    async def delete_session(self, session_id: str) -> bool:
+        return await self.redis.delete(self.KEY_PREFIX + session_id) > 0
+
+    async def get_session(self, session_id: str) -> Optional[Session]:
+        raw = await self.redis.get(self.KEY_PREFIX + session_id)
+        if raw is None:
+            return None
+        # Written by update_session from a valid Session, so skip re-validation
+        return Session.model_construct(**orjson.loads(raw))
+
+
 # Global instance
-session_service = SessionService()
\ No newline at end of file
+session_service = RedisSessionService(REDIS_URL) if REDIS_URL else SessionService()
@@ -5,17 +5,45 @@ Note: This is separate from query_validator.py which handles input sanitization
 """
 
 import csv
+import logging
+import os
+import pickle
+import re
+from bisect import bisect_right
 from typing import Optional, Dict, List
 from pathlib import Path
-from difflib import SequenceMatcher
+
+from rapidfuzz import fuzz, process
+
+log = logging.getLogger(__name__)
 
 
 class AirportValidator:
+    # Common prefixes/suffixes dropped from location names, stripped in one pass
+    STRIP_WORDS_RE = re.compile(r" (?:airport|international|domestic)")
+    
+    # Words of free text, for spotting place names in a whole query
+    WORD_RE = re.compile(r"[^\W\d_]+")
+    
+    # Bump when the parsed shape changes so stale pickles next to the CSV are ignored
+    CACHE_VERSION = 1
+    
     def __init__(self, csv_path: str = "data/airports.csv"):
         self.csv_path = csv_path
+        self.cache_path = Path(csv_path).with_suffix(".pickle")  # parsed airports, reused across processes
         self.airports: Dict[str, Dict] = {}  # IATA -> airport info
         self.city_to_iata: Dict[str, str] = {}  # city name -> IATA
         self.alternative_names: Dict[str, str] = {}  # alternative name -> canonical city
+        self._city_list: List[str] = []  # city_to_iata keys, built once for fuzzy matching
+        # Substring index over _city_list: the cities joined into one haystack plus exact lookup by name
+        self._city_haystack = ""
+        self._city_starts: List[int] = []
+        self._city_positions: Dict[str, int] = {}
+        self._city_lengths: List[int] = []
+        # All keyword strings joined into one haystack; _keyword_starts[i] is where _keyword_iatas[i]'s keywords begin
+        self._keyword_haystack = ""
+        self._keyword_starts: List[int] = []
+        self._keyword_iatas: List[str] = []
         
         # Define alternative city names and IATA mappings
         self.alternative_mappings = {
@@ -71,70 +99,163 @@ class AirportValidator:
         self._load_airports()
     
     def _load_airports(self):
-        """Load airports from CSV file - only large_airport type"""
+        """Load airports from the parsed cache if it is current, otherwise from the CSV - only large_airport type"""
         try:
-            with open(self.csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
+            csv_stat = os.stat(self.csv_path)
+            cache_key = (self.CACHE_VERSION, csv_stat.st_mtime_ns, csv_stat.st_size)
+            
+            if not self._load_airports_cache(cache_key):
+                self._parse_airports_csv()
+                self._write_airports_cache(cache_key)
+            
+            self._city_list = list(self.city_to_iata.keys())
+            self._build_keyword_index()
+            self._build_city_index()
+            
+            log.info("✅ Loaded %s large airports from %s", len(self.airports), self.csv_path)
+            log.info("✅ Mapped %s city names to IATA codes", len(self.city_to_iata))
                 
-                for row in reader:
-                    # Only process large airports
-                    airport_type = (row.get("type") or "").strip().lower()
-                    if airport_type != "large_airport":
-                        continue
-                    
-                    iata = (row.get("iata_code") or "").strip().upper()
-                    city = (row.get("municipality") or "").strip().lower()
-                    
-                    # Skip if no IATA code
-                    if not iata or len(iata) != 3:
-                        continue
-                    
-                    airport_info = {
-                        "iata": iata,
-                        "name": row.get("name", "").strip(),
-                        "city": row.get("municipality", "").strip(),
-                        "country": row.get("iso_country", "").strip(),
-                        "type": airport_type,
-                        "keywords": (row.get("keywords") or "").strip().lower(),
-                        "iso_region": row.get("iso_region", "").strip(),
-                    }
-                    
-                    # Store airport by IATA code
-                    self.airports[iata] = airport_info
-                    
-                    # Map city name to IATA (lowercase for matching)
-                    if city:
-                        self.city_to_iata[city] = iata
-                    
-                    # Also map keywords to IATA if present
-                    keywords = airport_info["keywords"]
-                    if keywords:
-                        keyword_list = [k.strip() for k in keywords.split(',')]
-                        for keyword in keyword_list:
-                            if keyword and keyword not in self.city_to_iata:
-                                self.city_to_iata[keyword] = iata
+        except FileNotFoundError:
+            log.error("❌ Error: %s not found!", self.csv_path)
+        except Exception as e:
+            log.error("❌ Error loading airports: %s", e)
+    
+    def _parse_airports_csv(self):
+        """Build self.airports and self.city_to_iata from the CSV rows"""
+        with open(self.csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            
+            for row in reader:
+                # Only process large airports
+                airport_type = (row.get("type") or "").strip().lower()
+                if airport_type != "large_airport":
+                    continue
                 
-                print(f"✅ Loaded {len(self.airports)} large airports from {self.csv_path}")
-                print(f"✅ Mapped {len(self.city_to_iata)} city names to IATA codes")
+                iata = (row.get("iata_code") or "").strip().upper()
+                city = (row.get("municipality") or "").strip().lower()
                 
+                # Skip if no IATA code
+                if not iata or len(iata) != 3:
+                    continue
+                
+                airport_info = {
+                    "iata": iata,
+                    "name": row.get("name", "").strip(),
+                    "city": row.get("municipality", "").strip(),
+                    "country": row.get("iso_country", "").strip(),
+                    "type": airport_type,
+                    "keywords": (row.get("keywords") or "").strip().lower(),
+                    "iso_region": row.get("iso_region", "").strip(),
+                }
+                
+                # Store airport by IATA code
+                self.airports[iata] = airport_info
+                
+                # Map city name to IATA (lowercase for matching)
+                if city:
+                    self.city_to_iata[city] = iata
+                
+                # Also map keywords to IATA if present
+                keywords = airport_info["keywords"]
+                if keywords:
+                    keyword_list = [k.strip() for k in keywords.split(',')]
+                    for keyword in keyword_list:
+                        if keyword and keyword not in self.city_to_iata:
+                            self.city_to_iata[keyword] = iata
+    
+    def _load_airports_cache(self, cache_key) -> bool:
+        """Restore the parsed dicts from the pickle if it was written for this exact CSV"""
+        try:
+            with open(self.cache_path, "rb") as f:
+                cached = pickle.load(f)
         except FileNotFoundError:
-            print(f"❌ Error: {self.csv_path} not found!")
+            return False
         except Exception as e:
-            print(f"❌ Error loading airports: {e}")
+            log.warning("⚠️ Ignoring unreadable airports cache %s: %s", self.cache_path, e)
+            return False
+        
+        if cached.get("key") != cache_key:
+            return False
+        
+        self.airports = cached["airports"]
+        self.city_to_iata = cached["city_to_iata"]
+        return True
+    
+    def _write_airports_cache(self, cache_key):
+        """Pickle the parsed dicts; written to a temp file and renamed so concurrent workers never read a partial file"""
+        tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(
+                    {"key": cache_key, "airports": self.airports, "city_to_iata": self.city_to_iata},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            log.warning("⚠️ Could not write airports cache %s: %s", self.cache_path, e)
+    
+    def _build_keyword_index(self):
+        """Join every airport's keywords into one NUL-separated string so lookups are a single find()"""
+        offset = 0
+        parts = []
+        for iata, airport in self.airports.items():
+            self._keyword_starts.append(offset)
+            self._keyword_iatas.append(iata)
+            parts.append(airport["keywords"])
+            offset += len(airport["keywords"]) + 1
+        self._keyword_haystack = "\0".join(parts)
+    
+    def _build_city_index(self):
+        """Index city names for the substring check in _fuzzy_match_city"""
+        offset = 0
+        for position, city in enumerate(self._city_list):
+            self._city_starts.append(offset)
+            self._city_positions[city] = position
+            offset += len(city) + 1
+        self._city_haystack = "\0".join(self._city_list)
+        self._city_lengths = sorted({len(city) for city in self._city_list})
+    
+    def _substring_match(self, query: str) -> Optional[str]:
+        """
+        First city (in _city_list order) that contains the query or is contained in it.
+        "query in city" is one find() over the haystack; "city in query" looks up each
+        substring of the query with a city-name length, which is far fewer than the cities.
+        """
+        if not query or "\0" in query:
+            return None
+        
+        first = None
+        pos = self._city_haystack.find(query)
+        if pos != -1:
+            first = bisect_right(self._city_starts, pos) - 1
+        
+        for length in self._city_lengths:
+            if length > len(query):
+                break
+            for start in range(len(query) - length + 1):
+                position = self._city_positions.get(query[start:start + length])
+                if position is not None and (first is None or position < first):
+                    first = position
+        
+        return self._city_list[first] if first is not None else None
+    
+    def _keyword_match(self, normalized: str) -> Optional[str]:
+        """IATA of the first airport whose keywords contain the query, as the old per-airport scan found"""
+        # Queries can't contain the separator, so a hit never spans two airports
+        if not self._keyword_iatas or "\0" in normalized:
+            return None
+        pos = self._keyword_haystack.find(normalized)
+        if pos == -1:
+            return None
+        return self._keyword_iatas[bisect_right(self._keyword_starts, pos) - 1]
     
     def normalize_input(self, text: str) -> str:
         """Normalize input text for matching"""
         if not text:
             return ""
         
-        normalized = text.strip().lower()
-        
-        # Remove common prefixes/suffixes
-        normalized = normalized.replace(" airport", "")
-        normalized = normalized.replace(" international", "")
-        normalized = normalized.replace(" domestic", "")
-        
-        return normalized
+        return self.STRIP_WORDS_RE.sub("", text.strip().lower())
     
     def get_iata_code(self, location: str) -> Optional[str]:
         """
@@ -155,46 +276,45 @@ class AirportValidator:
         
         # Strategy 1: Check if input is already a valid IATA code
         if len(original_upper) == 3 and original_upper in self.airports:
-            print(f"✅ Direct IATA match: {location} -> {original_upper}")
+            log.debug("✅ Direct IATA match: %s -> %s", location, original_upper)
             return original_upper
         
         # Strategy 2: Check alternative mappings first (handles common aliases)
         if normalized in self.alternative_mappings:
             canonical = self.alternative_mappings[normalized]
-            print(f"🔄 Alternative name mapped: {location} -> {canonical}")
+            log.debug("🔄 Alternative name mapped: %s -> %s", location, canonical)
             
             # Now search for the canonical name
             if canonical in self.city_to_iata:
                 iata = self.city_to_iata[canonical]
-                print(f"✅ Found IATA for {canonical}: {iata}")
+                log.debug("✅ Found IATA for %s: %s", canonical, iata)
                 return iata
         
         # Strategy 3: Direct city name lookup
         if normalized in self.city_to_iata:
             iata = self.city_to_iata[normalized]
-            print(f"✅ Direct city match: {location} -> {iata}")
+            log.debug("✅ Direct city match: %s -> %s", location, iata)
             return iata
         
         # Strategy 4: Fuzzy matching on city names
         best_match = self._fuzzy_match_city(normalized)
         if best_match:
             iata = self.city_to_iata[best_match]
-            print(f"✅ Fuzzy match: {location} -> {best_match} -> {iata}")
+            log.debug("✅ Fuzzy match: %s -> %s -> %s", location, best_match, iata)
             return iata
         
         # Strategy 5: Search in keywords
-        for iata, airport in self.airports.items():
-            keywords = airport.get("keywords", "").lower()
-            if normalized in keywords:
-                print(f"✅ Keyword match: {location} -> {iata}")
-                return iata
+        iata = self._keyword_match(normalized)
+        if iata:
+            log.debug("✅ Keyword match: %s -> %s", location, iata)
+            return iata
         
-        print(f"❌ No IATA code found for: {location}")
+        log.debug("❌ No IATA code found for: %s", location)
         return None
     
     def _fuzzy_match_city(self, query: str, threshold: float = 0.85) -> Optional[str]:
         """
-        Fuzzy match city name using sequence matching
+        Fuzzy match city name using rapidfuzz similarity ratios
         
         Args:
             query: Normalized city name
@@ -203,25 +323,35 @@ class AirportValidator:
         Returns:
             Best matching city name or None
         """
-        best_match = None
-        best_score = 0.0
+        # rapidfuzz scores 0-100 in C instead of a Python SequenceMatcher loop over every city
+        match = process.extractOne(
+            query, self._city_list, scorer=fuzz.ratio, score_cutoff=threshold * 100
+        )
+        if match and match[1] >= 90:
+            log.debug("🔍 Fuzzy match score: %.2f - %s ≈ %s", match[1] / 100, query, match[0])
+            return match[0]
         
-        for city in self.city_to_iata.keys():
-            # Calculate similarity
-            score = SequenceMatcher(None, query, city).ratio()
-            
-            # Also check if query is a substring or vice versa
-            if query in city or city in query:
-                score = max(score, 0.9)
-            
-            if score > best_score and score >= threshold:
-                best_score = score
-                best_match = city
+        # Substring hits (query in city or vice versa) keep their 0.9 boost over weaker ratio matches
+        substring = self._substring_match(query)
+        if substring:
+            log.debug("🔍 Fuzzy match score: 0.90 - %s ≈ %s", query, substring)
+            return substring
         
-        if best_match:
-            print(f"🔍 Fuzzy match score: {best_score:.2f} - {query} ≈ {best_match}")
+        if match:
+            log.debug("🔍 Fuzzy match score: %.2f - %s ≈ %s", match[1] / 100, query, match[0])
+            return match[0]
         
-        return best_match
+        return None
+    
+    def mentions_location(self, text: str) -> bool:
+        """True if any word or 2-3 word phrase of the text is a known city, alias or IATA code"""
+        words = self.WORD_RE.findall(text.lower())
+        for size in (1, 2, 3):
+            for start in range(len(words) - size + 1):
+                phrase = " ".join(words[start:start + size])
+                if phrase in self.city_to_iata or phrase in self.alternative_mappings or phrase.upper() in self.airports:
+                    return True
+        return False
     
     def validate_and_fix_iata(self, origin: Optional[str], destination: Optional[str]) -> Dict[str, Optional[str] | bool]:
         """
@@ -234,11 +364,13 @@ class AirportValidator:
         Returns:
             Dict with corrected origin and destination IATA codes and validation flags
         """
-        print(f"\n{'='*70}")
-        print("AIRPORT VALIDATION - START")
-        print(f"{'='*70}")
-        print(f"📍 Original Origin: {origin}")
-        print(f"📍 Original Destination: {destination}")
+        debug = log.isEnabledFor(logging.DEBUG)
+        if debug:
+            log.debug("=" * 70)
+            log.debug("AIRPORT VALIDATION - START")
+            log.debug("=" * 70)
+            log.debug("📍 Original Origin: %s", origin)
+            log.debug("📍 Original Destination: %s", destination)
         
         corrected_origin = None
         corrected_destination = None
@@ -249,9 +381,10 @@ class AirportValidator:
         if destination:
             corrected_destination = self.get_iata_code(destination)
         
-        print(f"\n✅ Corrected Origin: {corrected_origin}")
-        print(f"✅ Corrected Destination: {corrected_destination}")
-        print(f"{'='*70}\n")
+        if debug:
+            log.debug("✅ Corrected Origin: %s", corrected_origin)
+            log.debug("✅ Corrected Destination: %s", corrected_destination)
+            log.debug("=" * 70)
         
         return {
             "origin": corrected_origin,
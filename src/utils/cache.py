@@ -1,6 +1,26 @@
-from typing import Dict
+import hashlib
+import json
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import amadeus
+import diskcache
+from cachetools import TTLCache
+
+from src.config.settings import (
+    REQUEST_REPLAY_MAX_ENTRIES,
+    REQUEST_REPLAY_TTL_SECONDS,
+    TOOL_CACHE_DIR,
+    TOOL_CACHE_SIZE_LIMIT,
+    TOOL_CACHE_TTL_SECONDS,
+)
+from src.models.state import AgentState
 from src.services.amadeus_service import amadeus_service
 
+log = logging.getLogger(__name__)
+
 
 class AirportCityCache:
     def __init__(self):
@@ -21,5 +41,97 @@ class AirportCityCache:
             return iata_code  # Fallback to IATA code
 
 
-# Global instance
-airport_cache = AirportCityCache()
\ No newline at end of file
+class ToolResultCache:
+    """
+    Disk-backed TTL cache for tool node results, keyed by the search parameters of the intent.
+    Survives backend restarts, so repeated searches during development don't hit Amadeus again.
+    """
+
+    def __init__(
+        self,
+        directory: str = TOOL_CACHE_DIR,
+        ttl_seconds: int = TOOL_CACHE_TTL_SECONDS,
+        size_limit: int = TOOL_CACHE_SIZE_LIMIT,
+    ):
+        # diskcache is thread- and process-safe, so parallel tool nodes need no extra lock
+        self.cache = diskcache.Cache(directory, size_limit=size_limit)
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def make_key(tool_name: str, intent: Dict[str, Any], fields: Iterable[str]) -> str:
+        """
+        Stable key for the intent fields the tool actually searches on.
+        The Amadeus SDK version is part of the key so an upgrade doesn't serve old result shapes.
+        """
+        params = {field: intent.get(field) for field in fields}
+        raw = json.dumps({"tool": tool_name, "amadeus": amadeus.version, **params}, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(key)
+
+    def set(self, key: str, result: Dict[str, Any]):
+        self.cache.set(key, result, expire=self.ttl_seconds)
+
+
+class RequestReplayCache:
+    """Finished API responses keyed by the client's request_id, so a retried POST doesn't run the agent twice"""
+
+    def __init__(self, max_entries: int = REQUEST_REPLAY_MAX_ENTRIES, ttl_seconds: int = REQUEST_REPLAY_TTL_SECONDS):
+        self.cache: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        # Sync FastAPI endpoints run on a thread pool
+        self.lock = threading.Lock()
+
+    def get(self, request_id: Optional[str]) -> Any:
+        if not request_id:
+            return None
+        with self.lock:
+            return self.cache.get(request_id)
+
+    def set(self, request_id: Optional[str], response: Any):
+        if not request_id:
+            return
+        with self.lock:
+            self.cache[request_id] = response
+
+
+def cached_tool(tool_name: str, result_key: str, fields: Iterable[str]):
+    """
+    Memoize a tool node on the intent fields it searches on.
+    Only results that actually contain data under result_key are cached, so errors,
+    web-search fallbacks and degraded entries (available: False, e.g. hotels listed
+    without offers after the offer lookups failed) are always retried.
+    """
+    fields = tuple(fields)
+
+    def decorator(node: Callable[[AgentState], Dict[str, Any]]):
+        @wraps(node)
+        def wrapper(state: AgentState) -> Dict[str, Any]:
+            if state.intent is None:
+                return node(state)
+
+            key = tool_cache.make_key(tool_name, state.intent, fields)
+            hit = tool_cache.get(key)
+            if hit is not None:
+                log.debug("⚡ %s cache hit", tool_name)
+                return dict(hit)
+
+            result = node(state)
+            entries = result.get(result_key)
+            if (
+                entries
+                and not result.get("use_web_search")
+                and all(entry.get("available", True) for entry in entries)
+            ):
+                tool_cache.set(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+# Global instances
+airport_cache = AirportCityCache()
+tool_cache = ToolResultCache()
+replay_cache = RequestReplayCache()